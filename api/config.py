@@ -1,25 +1,49 @@
 """Application configuration."""
-import redis
-from typing import Optional
+import asyncio
+import logging
+import redis.asyncio as aioredis
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
 
 # Redis Configuration
 REDIS_HOST = "queue"
 REDIS_PORT = 6379
 REDIS_DB = 0
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+REDIS_MAX_CONNECTIONS = 64  # Callers wait for a free connection beyond this
+REDIS_HEALTH_CHECK_INTERVAL = 30  # Seconds a pooled connection may idle before a PING
 REDIS_QUEUE_NAME = "job_queue"
 REDIS_BUILD_QUEUE_NAME = "build_queue"
+JOB_ENQUEUE_BATCH_SIZE = 256  # Max job payloads pushed per LPUSH
+JOB_RESULT_KEY = "job:{}"  # Cached results of a finished job
+JOB_RESULT_CACHE_TTL = 300  # Seconds finished job results stay cached
+JOB_PENDING_CACHE_TTL = 3600  # Seconds a queued job's PENDING result stays cached
+TERMINAL_JOB_STATUSES = frozenset({"COMPLETED", "FAILED", "TIMEOUT", "ERROR"})
+JOB_EVENTS_CHANNEL = "job_events"  # Pub/sub channel the worker announces finished job IDs on
+MAX_RESULT_WAIT_MS = 30000  # Longest a results request may long-poll for completion
+TEMPLATE_CACHE_KEY = "templates:cache"  # Prefix of the hashes of serialized template responses
+COMPILER_CACHE_KEY = "compilers:cache"  # Prefix of the hashes of serialized compiler responses
+CATALOG_CACHE_VERSION_KEY = "{}:version"  # INCR to retire every response cached under a prefix
+COMPILER_CONFIG_GEN_KEY = "compiler_config_gen:{}"  # INCR to retire workers' shared copy of a config
+BUILD_QUEUED_KEY = "build_queued:{}"  # Set while a compiler build waits in the queue
+BUILD_QUEUED_TTL = 600  # Worker build timeout; a marker lives this long per build queued up to it
+CATALOG_CACHE_TTL = 300  # Seconds a template/compiler cache hash lives
 
 # Database Configuration
-DATABASE_URL = "postgresql://admin:admin@db/yantra_db"
+DATABASE_URL = "postgresql+asyncpg://admin:admin@db/yantra_db"
+DB_STATEMENT_TIMEOUT_MS = 5000  # Server-side limit for any single API query
 
 # File Upload Configuration
 MAX_UPLOAD_SIZE = 25 * 1024 * 1024  # 25MB total per submission
 MAX_FILES_PER_SUBMISSION = 10  # Maximum number of files per submission
-ALLOWED_EXTENSIONS = {
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per chunk when streaming uploads to disk
+ALLOWED_EXTENSIONS = frozenset({
     ".txt", ".json", ".csv", ".xml", ".yaml", ".yml",
     ".md", ".dat", ".log", ".tsv", ".ini", ".conf",
     ".properties", ".sql", ".html", ".css", ".js"
-}  # Whitelist of allowed file extensions
+})  # Whitelist of allowed file extensions
 EXECUTOR_JOBS_DIR = "/tmp/executor_jobs"  # Directory for job files
 CONTAINER_MOUNT_PATH = "/data"  # Path where files are mounted in container
 
@@ -55,13 +79,238 @@ API_LICENSE = {
     "name": "MIT",
 }
 
-# Redis connection (singleton)
-_redis_conn: Optional[redis.Redis] = None
+# Redis client (singleton, created in the app lifespan)
+_redis_client: Optional[aioredis.Redis] = None
+
+
+def get_redis_connection() -> aioredis.Redis:
+    """Get the shared asyncio Redis client and its connection pool."""
+    global _redis_client
+    if _redis_client is None:
+        pool = aioredis.BlockingConnectionPool.from_url(
+            REDIS_URL,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            socket_keepalive=True,
+            health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        )
+        _redis_client = aioredis.Redis(connection_pool=pool)
+    return _redis_client
+
+
+async def close_redis_connections() -> None:
+    """Disconnect every pooled Redis connection."""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose(close_connection_pool=True)
+        _redis_client = None
+
+
+# Response caching
+# Each cached resource keeps all of its serialized responses (list variants
+# and single items) as fields of one hash named after the resource's cache
+# version, so any write invalidates the whole resource with a single INCR.
+# A read that raced that INCR stores its now stale body under the retired
+# version, which no later read looks at and which expires on its own.
+_READ_CACHED_RESPONSE_SCRIPT = """
+local version = redis.call('GET', KEYS[1]) or '0'
+return {version, redis.call('HGET', KEYS[2] .. ':' .. version, ARGV[1])}
+"""
+
+_read_cached_response = None  # AsyncScript, registered on first use
+
+
+async def get_cached_response(key: str, field: str) -> Tuple[Optional[bytes], str]:
+    """Return a cached response body (None on a miss) and the cache version it was read at."""
+    global _read_cached_response
+    redis_conn = get_redis_connection()
+    if _read_cached_response is None:
+        _read_cached_response = redis_conn.register_script(_READ_CACHED_RESPONSE_SCRIPT)
+    # A miss comes back without the body: Lua nil ends the reply array
+    version, *body = await _read_cached_response(
+        keys=[CATALOG_CACHE_VERSION_KEY.format(key), key], args=[field], client=redis_conn
+    )
+    return (body[0] if body else None), version.decode()
+
+
+async def cache_response(key: str, version: str, field: str, body: bytes) -> None:
+    """Store a response body read at version; the hash expires CATALOG_CACHE_TTL after its first fill."""
+    hash_key = f"{key}:{version}"
+    async with get_redis_connection().pipeline(transaction=False) as pipe:
+        pipe.hset(hash_key, field, body)
+        pipe.expire(hash_key, CATALOG_CACHE_TTL, nx=True)
+        await pipe.execute()
+
+
+# Build coalescing
+# A build_queued:{id} marker is held while a compiler's build waits in the
+# build queue; producers only push a build when they claim the marker, and the
+# worker deletes it on pick-up. The expiry only matters for a lost payload.
+async def claim_build_markers(compiler_ids: List[str]) -> List[str]:
+    """Claim the queued-build markers that are free; returns the IDs that were claimed."""
+    redis_conn = get_redis_connection()
+    # A marker must outlive every build queued ahead of it, each of which may run
+    # for the full build timeout
+    backlog = await redis_conn.llen(REDIS_BUILD_QUEUE_NAME)
+    async with redis_conn.pipeline(transaction=False) as pipe:
+        for position, compiler_id in enumerate(compiler_ids, start=backlog + 1):
+            pipe.set(
+                BUILD_QUEUED_KEY.format(compiler_id), 1, nx=True, ex=BUILD_QUEUED_TTL * position
+            )
+        claimed = await pipe.execute()
+    return [compiler_id for compiler_id, ok in zip(compiler_ids, claimed) if ok]
+
+
+async def release_build_markers(compiler_ids: List[str]) -> None:
+    """Drop queued-build markers whose build never made it into the queue."""
+    if compiler_ids:
+        await get_redis_connection().delete(
+            *(BUILD_QUEUED_KEY.format(compiler_id) for compiler_id in compiler_ids)
+        )
+
+
+# Job enqueue batching
+# Submissions hand their payload to an in-process queue; a single background
+# task drains it and pushes everything that piled up with one script call.
+# The script also caches each job's PENDING result so status polls can be
+# answered from Redis until the worker picks the job up (and deletes it).
+_ENQUEUE_JOBS_SCRIPT = """
+local ttl = ARGV[1]
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i], ARGV[2 * i - 2], 'EX', ttl)
+    redis.call('LPUSH', KEYS[1], ARGV[2 * i - 1])
+end
+return #KEYS - 1
+"""
+
+_job_queue: Optional[asyncio.Queue] = None
+_job_flusher: Optional[asyncio.Task] = None
+_enqueue_jobs = None  # AsyncScript; runs via EVALSHA, falling back to EVAL on NOSCRIPT
+
+
+async def enqueue_job(job_id: str, payload: bytes, pending_result: bytes) -> None:
+    """Buffer a serialized job and its initial result for the next batched push."""
+    await _job_queue.put((JOB_RESULT_KEY.format(job_id), pending_result, payload))
+
+
+def _drain_job_queue() -> List[Tuple[str, bytes, bytes]]:
+    """Pop up to JOB_ENQUEUE_BATCH_SIZE buffered jobs without waiting."""
+    batch = []
+    while len(batch) < JOB_ENQUEUE_BATCH_SIZE:
+        try:
+            batch.append(_job_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return batch
+
+
+async def _push_jobs(batch: List[Tuple[str, bytes, bytes]]) -> None:
+    """Push a batch of jobs, retrying until Redis accepts them."""
+    keys = [REDIS_QUEUE_NAME]
+    args = [JOB_PENDING_CACHE_TTL]
+    for result_key, pending_result, payload in batch:
+        keys.append(result_key)
+        args.extend((pending_result, payload))
+
+    # Pushing in submission order keeps the worker's right-side pops FIFO
+    while True:
+        try:
+            await _enqueue_jobs(keys=keys, args=args)
+            return
+        except (aioredis.ConnectionError, aioredis.TimeoutError, OSError) as e:
+            # Lost connections and pool waits (asyncio.TimeoutError) clear up on their own;
+            # anything else would fail the same way again
+            logger.error(f"Failed to push {len(batch)} jobs to Redis, retrying: {e}")
+            await asyncio.sleep(1)
+
+
+async def _flush_jobs_forever() -> None:
+    """Wait for the first pending job, then push it with everything queued behind it."""
+    stopping = False
+    while not (stopping and _job_queue.empty()):
+        batch = [await _job_queue.get()]
+        batch.extend(_drain_job_queue())
+        # A None entry is the shutdown sentinel queued by stop_job_enqueuer
+        stopping = stopping or None in batch
+        batch = [job for job in batch if job is not None]
+        if not batch:
+            continue
+        try:
+            await _push_jobs(batch)
+        except Exception:
+            # The flusher must outlive any one batch, or every later submission is lost
+            job_ids = ", ".join(result_key.split(":", 1)[1] for result_key, _, _ in batch)
+            logger.exception(f"Dropped {len(batch)} jobs that could not be pushed: {job_ids}")
+
+
+def start_job_enqueuer() -> None:
+    """Create the job buffer and start its background flusher."""
+    global _job_queue, _job_flusher, _enqueue_jobs
+    _job_queue = asyncio.Queue()
+    _enqueue_jobs = get_redis_connection().register_script(_ENQUEUE_JOBS_SCRIPT)
+    _job_flusher = asyncio.create_task(_flush_jobs_forever())
+
+
+async def stop_job_enqueuer(timeout: float = 10.0) -> None:
+    """Push any buffered jobs and stop the flusher."""
+    global _job_flusher
+    if _job_flusher is not None:
+        _job_queue.put_nowait(None)
+        try:
+            await asyncio.wait_for(_job_flusher, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Dropped {_job_queue.qsize()} buffered jobs on shutdown")
+        _job_flusher = None
+
+
+# Job completion events
+# The worker publishes each finished job ID on JOB_EVENTS_CHANNEL. One
+# subscriber per API process wakes every request long-polling that job, so
+# waiting clients neither poll the database nor hold a Redis connection each.
+_job_waiters: Dict[str, Set[asyncio.Event]] = {}
+_job_listener: Optional[asyncio.Task] = None
+
+
+@contextmanager
+def watch_job(job_id: str) -> Iterator[asyncio.Event]:
+    """Yield an event that is set once the worker reports job_id finished."""
+    event = asyncio.Event()
+    waiters = _job_waiters.setdefault(job_id, set())
+    waiters.add(event)
+    try:
+        yield event
+    finally:
+        waiters.discard(event)
+        if not waiters and _job_waiters.get(job_id) is waiters:
+            del _job_waiters[job_id]
+
+
+async def _listen_job_events_forever() -> None:
+    """Relay job completion messages to local waiters, resubscribing after Redis errors."""
+    while True:
+        try:
+            async with get_redis_connection().pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(JOB_EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    for event in _job_waiters.get(message["data"].decode(), ()):
+                        event.set()
+        except aioredis.RedisError as e:
+            logger.error(f"Lost job event subscription, resubscribing: {e}")
+            await asyncio.sleep(1)
+
+
+def start_job_event_listener() -> None:
+    """Start the background job completion subscriber."""
+    global _job_listener
+    _job_listener = asyncio.create_task(_listen_job_events_forever())
 
 
-def get_redis_connection() -> redis.Redis:
-    """Get or create Redis connection."""
-    global _redis_conn
-    if _redis_conn is None:
-        _redis_conn = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
-    return _redis_conn
+async def stop_job_event_listener() -> None:
+    """Stop the job completion subscriber."""
+    global _job_listener
+    if _job_listener is not None:
+        _job_listener.cancel()
+        try:
+            await _job_listener
+        except asyncio.CancelledError:
+            pass
+        _job_listener = None
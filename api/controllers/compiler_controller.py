@@ -1,24 +1,85 @@
 """Controller for handling compiler management business logic."""
-import json
 from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from fastapi import HTTPException, Response
 
 from models.database import Compiler
 from models.schemas import (
     CreateCompilerRequest,
     UpdateCompilerRequest,
-    CompilerResponse,
 )
-from config import get_redis_connection, REDIS_BUILD_QUEUE_NAME
+from config import (
+    get_redis_connection,
+    get_cached_response,
+    cache_response,
+    REDIS_BUILD_QUEUE_NAME,
+    COMPILER_CACHE_KEY,
+    CATALOG_CACHE_VERSION_KEY,
+    COMPILER_CONFIG_GEN_KEY,
+    BUILD_QUEUED_KEY,
+    claim_build_markers,
+    release_build_markers,
+)
+from serialization import dump_json
+
+# Columns rendered by CompilerResponse; leaves out the potentially large build_logs
+_RESPONSE_COLUMNS = (
+    Compiler.id,
+    Compiler.name,
+    Compiler.dockerfile_content,
+    Compiler.run_command,
+    Compiler.image_tag,
+    Compiler.version,
+    Compiler.memory_limit,
+    Compiler.cpu_limit,
+    Compiler.timeout_seconds,
+    Compiler.enabled,
+    Compiler.build_status,
+    Compiler.build_error,
+    Compiler.created_at,
+    Compiler.updated_at,
+    Compiler.built_at,
+)
+
+# Columns rendered by CompilerSummaryResponse; also leaves out dockerfile_content
+_SUMMARY_COLUMNS = tuple(c for c in _RESPONSE_COLUMNS if c is not Compiler.dockerfile_content)
+
+# Statements for the per-compiler endpoints, built once at import
+_GET_COMPILER = select(*_RESPONSE_COLUMNS).where(Compiler.id == bindparam("compiler_id"))
+_DELETE_COMPILER = (
+    delete(Compiler)
+    .where(Compiler.id == bindparam("compiler_id"))
+    .returning(Compiler.image_tag)
+)
+_TRIGGER_BUILD = (
+    update(Compiler)
+    .where(Compiler.id == bindparam("compiler_id"))
+    .values(build_status="pending", build_error=None, updated_at=func.now())
+    .returning(Compiler.id)
+)
+_GET_BUILD_LOGS = select(
+    Compiler.id,
+    Compiler.name,
+    Compiler.build_status,
+    Compiler.build_logs,
+    Compiler.build_error,
+    Compiler.built_at,
+    Compiler.updated_at,
+).where(Compiler.id == bindparam("compiler_id"))
+
+# Fields whose change invalidates the built image
+_REBUILD_FIELDS = frozenset({"dockerfile_content", "run_command"})
 
 
 class CompilerController:
     """Handles business logic for compiler management."""
 
     @staticmethod
-    def create_compiler(compiler_req: CreateCompilerRequest, db: Session) -> CompilerResponse:
+    async def create_compiler(
+        compiler_req: CreateCompilerRequest, db: AsyncSession
+    ) -> Response:
         """
         Create a new compiler and queue it for image building.
 
@@ -27,161 +88,191 @@ class CompilerController:
             db: Database session
 
         Returns:
-            CompilerResponse with the created compiler details
+            JSON response with the created compiler details
 
         Raises:
             HTTPException: If compiler ID already exists
         """
-        # Check if compiler ID already exists
-        existing = db.query(Compiler).filter(Compiler.id == compiler_req.id).first()
-        if existing:
-            raise HTTPException(
-                status_code=400, detail=f"Compiler with id '{compiler_req.id}' already exists"
-            )
-
         # Generate image tag
         image_tag = f"yantra-{compiler_req.id}:latest"
 
-        # Create compiler
-        new_compiler = Compiler(
-            id=compiler_req.id,
-            name=compiler_req.name,
-            dockerfile_content=compiler_req.dockerfile_content,
-            run_command=json.dumps(compiler_req.run_command),
-            image_tag=image_tag,
-            version=compiler_req.version,
-            memory_limit=compiler_req.memory_limit,
-            cpu_limit=compiler_req.cpu_limit,
-            timeout_seconds=compiler_req.timeout_seconds,
-            build_status="pending",
-            enabled=True,
+        # Insert unless the ID is taken; the conflict check and insert share one round trip
+        stmt = (
+            insert(Compiler)
+            .values(
+                id=compiler_req.id,
+                name=compiler_req.name,
+                dockerfile_content=compiler_req.dockerfile_content,
+                run_command=compiler_req.run_command,
+                image_tag=image_tag,
+                version=compiler_req.version,
+                memory_limit=compiler_req.memory_limit,
+                cpu_limit=compiler_req.cpu_limit,
+                timeout_seconds=compiler_req.timeout_seconds,
+                build_status="pending",
+                enabled=True,
+            )
+            .on_conflict_do_nothing(index_elements=[Compiler.id])
+            .returning(*_RESPONSE_COLUMNS)
         )
-        db.add(new_compiler)
-        db.commit()
-        db.refresh(new_compiler)
+        new_compiler = (await db.execute(stmt)).one_or_none()
+        if new_compiler is None:
+            raise HTTPException(
+                status_code=400, detail=f"Compiler with id '{compiler_req.id}' already exists"
+            )
 
-        # Queue build job
-        build_payload = {"compiler_id": compiler_req.id, "action": "build"}
-        redis_conn = get_redis_connection()
-        redis_conn.lpush(REDIS_BUILD_QUEUE_NAME, json.dumps(build_payload))
+        body = dump_json(CompilerController._to_dict(new_compiler))
+        await db.commit()
 
-        return CompilerController._to_response(new_compiler)
+        # Queue build job, marked as queued so later saves and triggers coalesce into it
+        claimed = await claim_build_markers([compiler_req.id])
+        try:
+            async with get_redis_connection().pipeline(transaction=False) as pipe:
+                pipe.incr(CATALOG_CACHE_VERSION_KEY.format(COMPILER_CACHE_KEY))
+                if claimed:
+                    build_payload = {"compiler_id": compiler_req.id, "action": "build"}
+                    pipe.lpush(REDIS_BUILD_QUEUE_NAME, dump_json(build_payload))
+                await pipe.execute()
+        except BaseException:
+            await release_build_markers(claimed)
+            raise
+
+        return Response(content=body, status_code=201, media_type="application/json")
 
     @staticmethod
-    def list_compilers(enabled_only: bool, db: Session) -> List[CompilerResponse]:
+    async def list_compilers(enabled_only: bool, summary: bool, db: AsyncSession) -> Response:
         """
-        List all compilers.
+        List all compilers, serving the serialized list from Redis when cached.
 
         Args:
             enabled_only: If True, only return enabled compilers
+            summary: If True, omit dockerfile_content
             db: Database session
 
         Returns:
-            List of CompilerResponse objects
+            JSON response with the list of compilers
         """
-        query = db.query(Compiler)
+        cache_field = f"list:{int(enabled_only)}:{int(summary)}"
+        cached, cache_version = await get_cached_response(COMPILER_CACHE_KEY, cache_field)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        stmt = select(*(_SUMMARY_COLUMNS if summary else _RESPONSE_COLUMNS))
 
         if enabled_only:
-            query = query.filter(Compiler.enabled == True)
+            stmt = stmt.where(Compiler.enabled == True)
 
-        compilers = query.order_by(Compiler.created_at.desc()).all()
+        stmt = stmt.order_by(Compiler.created_at.desc())
 
-        return [CompilerController._to_response(compiler) for compiler in compilers]
+        # Rows are encoded straight to JSON, skipping ORM and Pydantic objects
+        rows = await db.execute(stmt)
+        body = dump_json([CompilerController._to_dict(row) for row in rows])
+        await cache_response(COMPILER_CACHE_KEY, cache_version, cache_field, body)
+        return Response(content=body, media_type="application/json")
 
     @staticmethod
-    def get_compiler(compiler_id: str, db: Session) -> CompilerResponse:
+    async def get_compiler(compiler_id: str, db: AsyncSession) -> Response:
         """
-        Get a specific compiler by ID.
+        Get a specific compiler by ID, serving it from Redis when cached.
 
         Args:
             compiler_id: The compiler identifier
             db: Database session
 
         Returns:
-            CompilerResponse object
+            JSON response with the compiler details
 
         Raises:
             HTTPException: If compiler not found
         """
-        compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
+        cache_field = f"get:{compiler_id}"
+        cached, cache_version = await get_cached_response(COMPILER_CACHE_KEY, cache_field)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        compiler = (await db.execute(_GET_COMPILER, {"compiler_id": compiler_id})).one_or_none()
 
         if not compiler:
             raise HTTPException(status_code=404, detail=f"Compiler '{compiler_id}' not found")
 
-        return CompilerController._to_response(compiler)
+        body = dump_json(CompilerController._to_dict(compiler))
+        await cache_response(COMPILER_CACHE_KEY, cache_version, cache_field, body)
+        return Response(content=body, media_type="application/json")
 
     @staticmethod
-    def update_compiler(
-        compiler_id: str, update: UpdateCompilerRequest, db: Session
-    ) -> CompilerResponse:
+    async def update_compiler(
+        compiler_id: str, update_req: UpdateCompilerRequest, db: AsyncSession
+    ) -> Response:
         """
         Update a compiler and trigger rebuild if necessary.
 
         Args:
             compiler_id: The compiler identifier
-            update: The update request
+            update_req: The update request
             db: Database session
 
         Returns:
-            CompilerResponse with updated details
+            JSON response with the updated compiler details
 
         Raises:
             HTTPException: If compiler not found or no fields to update
         """
-        compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
-
-        if not compiler:
-            raise HTTPException(status_code=404, detail=f"Compiler '{compiler_id}' not found")
-
-        # Track if rebuild is needed
-        rebuild_needed = False
-
-        # Update fields
-        if update.name is not None:
-            compiler.name = update.name
-        if update.dockerfile_content is not None:
-            compiler.dockerfile_content = update.dockerfile_content
-            rebuild_needed = True
-        if update.run_command is not None:
-            compiler.run_command = json.dumps(update.run_command)
-            rebuild_needed = True
-        if update.version is not None:
-            compiler.version = update.version
-        if update.memory_limit is not None:
-            compiler.memory_limit = update.memory_limit
-        if update.cpu_limit is not None:
-            compiler.cpu_limit = update.cpu_limit
-        if update.timeout_seconds is not None:
-            compiler.timeout_seconds = update.timeout_seconds
-        if update.enabled is not None:
-            compiler.enabled = update.enabled
+        # Collect updated fields; omitted and null fields are left unchanged
+        values = update_req.model_dump(exclude_none=True)
 
         # Check if any update was provided
-        if all(getattr(update, field) is None for field in update.model_fields):
+        if not values:
             raise HTTPException(status_code=400, detail="No fields to update")
 
+        # Changing the image definition or how code is run requires a rebuild
+        rebuild_needed = not _REBUILD_FIELDS.isdisjoint(values)
+
         # Update timestamp
-        compiler.updated_at = func.now()
+        values["updated_at"] = func.now()
 
         # If rebuild needed, reset build status
         if rebuild_needed:
-            compiler.build_status = "pending"
-            compiler.build_error = None
-            compiler.built_at = None
-
-        db.commit()
-        db.refresh(compiler)
+            values["build_status"] = "pending"
+            values["build_error"] = None
+            values["built_at"] = None
+
+        # Update and read back the response columns (not build_logs) in a single statement
+        stmt = (
+            update(Compiler)
+            .where(Compiler.id == compiler_id)
+            .values(**values)
+            .returning(*_RESPONSE_COLUMNS)
+        )
+        compiler = (await db.execute(stmt)).one_or_none()
 
-        # Queue rebuild if needed
-        if rebuild_needed:
-            build_payload = {"compiler_id": compiler_id, "action": "build"}
-            redis_conn = get_redis_connection()
-            redis_conn.lpush(REDIS_BUILD_QUEUE_NAME, json.dumps(build_payload))
+        if not compiler:
+            raise HTTPException(status_code=404, detail=f"Compiler '{compiler_id}' not found")
 
-        return CompilerController._to_response(compiler)
+        body = dump_json(CompilerController._to_dict(compiler))
+        await db.commit()
+
+        # Invalidate cached responses and queue rebuild if needed. The worker reads the
+        # Dockerfile when it picks the build up, so a build still queued covers this save too.
+        claimed = await claim_build_markers([compiler_id]) if rebuild_needed else []
+        try:
+            async with get_redis_connection().pipeline(transaction=False) as pipe:
+                # Retire the workers' shared copy of the old settings; each worker
+                # still uses its in-process copy for up to 30 seconds
+                pipe.incr(CATALOG_CACHE_VERSION_KEY.format(COMPILER_CACHE_KEY))
+                pipe.incr(COMPILER_CONFIG_GEN_KEY.format(compiler_id))
+                if claimed:
+                    build_payload = {"compiler_id": compiler_id, "action": "build"}
+                    pipe.lpush(REDIS_BUILD_QUEUE_NAME, dump_json(build_payload))
+                await pipe.execute()
+        except BaseException:
+            # Nothing was queued; the next save must be able to queue the rebuild
+            await release_build_markers(claimed)
+            raise
+
+        return Response(content=body, media_type="application/json")
 
     @staticmethod
-    def delete_compiler(compiler_id: str, db: Session) -> Dict[str, str]:
+    async def delete_compiler(compiler_id: str, db: AsyncSession) -> Dict[str, str]:
         """
         Delete a compiler and queue cleanup of its Docker image.
 
@@ -195,16 +286,14 @@ class CompilerController:
         Raises:
             HTTPException: If compiler not found
         """
-        compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
+        # Delete from database, keeping the image tag for cleanup
+        result = await db.execute(_DELETE_COMPILER, {"compiler_id": compiler_id})
+        image_tag = result.scalar_one_or_none()
 
-        if not compiler:
+        if image_tag is None:
             raise HTTPException(status_code=404, detail=f"Compiler '{compiler_id}' not found")
 
-        image_tag = compiler.image_tag
-
-        # Delete from database
-        db.delete(compiler)
-        db.commit()
+        await db.commit()
 
         # Queue cleanup job
         cleanup_payload = {
@@ -212,16 +301,23 @@ class CompilerController:
             "image_tag": image_tag,
             "action": "cleanup",
         }
-        redis_conn = get_redis_connection()
-        redis_conn.lpush(REDIS_BUILD_QUEUE_NAME, json.dumps(cleanup_payload))
+        async with get_redis_connection().pipeline(transaction=False) as pipe:
+            pipe.incr(CATALOG_CACHE_VERSION_KEY.format(COMPILER_CACHE_KEY))
+            pipe.delete(BUILD_QUEUED_KEY.format(compiler_id))
+            pipe.incr(COMPILER_CONFIG_GEN_KEY.format(compiler_id))
+            pipe.lpush(REDIS_BUILD_QUEUE_NAME, dump_json(cleanup_payload))
+            await pipe.execute()
 
         return {"message": f"Compiler '{compiler_id}' deleted and cleanup queued"}
 
     @staticmethod
-    def trigger_build(compiler_id: str, db: Session) -> Dict[str, str]:
+    async def trigger_build(compiler_id: str, db: AsyncSession) -> Dict[str, str]:
         """
         Manually trigger a rebuild of the compiler's Docker image.
 
+        Triggers that arrive while an earlier triggered build is still waiting
+        in the queue are coalesced into it.
+
         Args:
             compiler_id: The compiler identifier
             db: Database session
@@ -232,26 +328,73 @@ class CompilerController:
         Raises:
             HTTPException: If compiler not found
         """
-        compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
+        # Only the first trigger claims the marker; the worker clears it on pick-up
+        if not await claim_build_markers([compiler_id]):
+            return {"message": f"Build already queued for compiler '{compiler_id}'"}
+
+        try:
+            # Update build status to pending
+            result = await db.execute(_TRIGGER_BUILD, {"compiler_id": compiler_id})
+            if result.scalar_one_or_none() is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Compiler '{compiler_id}' not found"
+                )
+            await db.commit()
+
+            # Queue build job
+            build_payload = {"compiler_id": compiler_id, "action": "build"}
+            async with get_redis_connection().pipeline(transaction=False) as pipe:
+                pipe.incr(CATALOG_CACHE_VERSION_KEY.format(COMPILER_CACHE_KEY))
+                pipe.incr(COMPILER_CONFIG_GEN_KEY.format(compiler_id))
+                pipe.lpush(REDIS_BUILD_QUEUE_NAME, dump_json(build_payload))
+                await pipe.execute()
+        except BaseException:
+            # Nothing was queued; later triggers must be able to claim the marker
+            await release_build_markers([compiler_id])
+            raise
 
-        if not compiler:
-            raise HTTPException(status_code=404, detail=f"Compiler '{compiler_id}' not found")
+        return {"message": f"Build queued for compiler '{compiler_id}'"}
 
-        # Update build status to pending
-        compiler.build_status = "pending"
-        compiler.build_error = None
-        compiler.updated_at = func.now()
-        db.commit()
+    @staticmethod
+    async def queue_pending_builds(db: AsyncSession) -> List[str]:
+        """
+        Queue an image build for every compiler that has never been built or queued.
 
-        # Queue build job
-        build_payload = {"compiler_id": compiler_id, "action": "build"}
-        redis_conn = get_redis_connection()
-        redis_conn.lpush(REDIS_BUILD_QUEUE_NAME, json.dumps(build_payload))
+        Compilers seeded by init.sql skip the create endpoint, so nothing
+        queued their first build. Compilers with a build already queued are
+        skipped, and all payloads go out in a single LPUSH.
 
-        return {"message": f"Build queued for compiler '{compiler_id}'"}
+        Args:
+            db: Database session
+
+        Returns:
+            IDs of the compilers whose builds were queued
+        """
+        stmt = select(Compiler.id).where(
+            Compiler.build_status == "pending", Compiler.built_at.is_(None)
+        )
+        pending_ids = list((await db.scalars(stmt)).all())
+        if not pending_ids:
+            return []
+
+        # Skip compilers whose build is already queued
+        compiler_ids = await claim_build_markers(pending_ids)
+
+        if compiler_ids:
+            build_payloads = [
+                dump_json({"compiler_id": compiler_id, "action": "build"})
+                for compiler_id in compiler_ids
+            ]
+            try:
+                await get_redis_connection().lpush(REDIS_BUILD_QUEUE_NAME, *build_payloads)
+            except BaseException:
+                await release_build_markers(compiler_ids)
+                raise
+
+        return compiler_ids
 
     @staticmethod
-    def get_build_logs(compiler_id: str, db: Session) -> Dict[str, Any]:
+    async def get_build_logs(compiler_id: str, db: AsyncSession) -> Dict[str, Any]:
         """
         Get the full build logs for a compiler.
 
@@ -265,7 +408,7 @@ class CompilerController:
         Raises:
             HTTPException: If compiler not found
         """
-        compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
+        compiler = (await db.execute(_GET_BUILD_LOGS, {"compiler_id": compiler_id})).one_or_none()
 
         if not compiler:
             raise HTTPException(status_code=404, detail=f"Compiler '{compiler_id}' not found")
@@ -281,21 +424,18 @@ class CompilerController:
         }
 
     @staticmethod
-    def _to_response(compiler: Compiler) -> CompilerResponse:
+    def _to_dict(row: Row) -> Dict[str, Any]:
         """
-        Convert database model to response schema.
+        Convert a column row to a CompilerResponse or CompilerSummaryResponse-shaped dict.
 
         Args:
-            compiler: The compiler database model
+            row: Row holding the _RESPONSE_COLUMNS or _SUMMARY_COLUMNS of one compiler
 
         Returns:
-            CompilerResponse object
+            Dictionary ready for JSON serialization
         """
-        response_data = {
-            **compiler.__dict__,
-            "run_command": json.loads(compiler.run_command),
-            "created_at": str(compiler.created_at),
-            "updated_at": str(compiler.updated_at),
-            "built_at": str(compiler.built_at) if compiler.built_at else None,
-        }
-        return CompilerResponse(**response_data)
+        data = row._asdict()
+        data["created_at"] = row.created_at.isoformat()
+        data["updated_at"] = row.updated_at.isoformat()
+        data["built_at"] = row.built_at.isoformat() if row.built_at else None
+        return data
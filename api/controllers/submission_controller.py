@@ -1,23 +1,45 @@
 """Controller for handling code submission business logic."""
+import asyncio
 import uuid
-import json
 import os
+import re
 import shutil
+import sys
+from contextlib import suppress
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from sqlalchemy.orm import Session
-from fastapi import HTTPException, UploadFile
+from typing import BinaryIO, Dict, Any, List, Optional
+from sqlalchemy import bindparam, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 
 from models.database import Compiler, Submission
 from models.schemas import SubmissionRequest, FileMetadata
 from config import (
     get_redis_connection,
-    REDIS_QUEUE_NAME,
+    enqueue_job,
+    watch_job,
+    JOB_RESULT_KEY,
+    JOB_RESULT_CACHE_TTL,
+    TERMINAL_JOB_STATUSES,
     MAX_UPLOAD_SIZE,
     MAX_FILES_PER_SUBMISSION,
     ALLOWED_EXTENSIONS,
     EXECUTOR_JOBS_DIR,
+    UPLOAD_CHUNK_SIZE,
 )
+from serialization import dump_json, load_json
+
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+_ALLOWED_EXTENSIONS_TEXT = ", ".join(sorted(ALLOWED_EXTENSIONS))
+_SENDFILE_TO_FILE = sys.platform == "linux"  # Other kernels only sendfile to sockets
+_FILE_METADATA_LIST = TypeAdapter(List[FileMetadata])
+_SUBMISSION_INSERT_COLUMNS = (
+    "job_id", "code", "language", "status", "uploaded_files", "files_directory"
+)
+_GET_SUBMISSION = select(Submission).where(Submission.job_id == bindparam("job_id"))
+_NOT_FOUND_RESULT = dump_json({"status": "NOT_FOUND"})
 
 
 class SubmissionController:
@@ -37,16 +59,9 @@ class SubmissionController:
         # Get just the basename (no path components)
         filename = os.path.basename(filename)
 
-        # Remove any remaining dangerous characters
-        # Keep only alphanumeric, dots, hyphens, and underscores
-        safe_chars = []
-        for char in filename:
-            if char.isalnum() or char in ".-_":
-                safe_chars.append(char)
-            else:
-                safe_chars.append("_")
-
-        sanitized = "".join(safe_chars)
+        # Replace any remaining dangerous characters
+        # Keep only ASCII alphanumerics, dots, hyphens, and underscores
+        sanitized = _UNSAFE_FILENAME_CHARS.sub("_", filename)
 
         # Ensure filename is not empty after sanitization
         if not sanitized or sanitized == ".":
@@ -65,11 +80,88 @@ class SubmissionController:
         Returns:
             True if extension is allowed, False otherwise
         """
-        ext = Path(filename).suffix.lower()
+        ext = os.path.splitext(filename)[1].lower()
         return ext in ALLOWED_EXTENSIONS
 
     @staticmethod
-    def _save_uploaded_files(
+    def _copy_upload(src: BinaryIO, file_path: Path, max_bytes: int) -> int:
+        """
+        Copy an upload's spooled content to disk, stopping once it exceeds max_bytes.
+
+        Uploads that Starlette has rolled over to a temporary file are copied
+        with sendfile, so the data never passes through Python.
+
+        Args:
+            src: The upload's underlying file object
+            file_path: Destination path
+            max_bytes: Number of bytes the caller is still willing to accept
+
+        Returns:
+            Number of bytes written (greater than max_bytes if the limit was exceeded)
+        """
+        written = 0
+        with open(file_path, "wb") as dst:
+            if _SENDFILE_TO_FILE and getattr(src, "_rolled", False):
+                src_fd, offset = src.fileno(), src.tell()
+                while written <= max_bytes:
+                    sent = os.sendfile(dst.fileno(), src_fd, offset + written, UPLOAD_CHUNK_SIZE)
+                    if sent == 0:
+                        break
+                    written += sent
+            else:
+                while written <= max_bytes and (chunk := src.read(UPLOAD_CHUNK_SIZE)):
+                    dst.write(chunk)
+                    written += len(chunk)
+        return written
+
+    @staticmethod
+    def _write_uploads(
+        files: List[UploadFile], job_dir: Path, safe_filenames: List[str]
+    ) -> List[int]:
+        """
+        Create the job directory and copy every upload into it, enforcing the size limits.
+
+        Runs in a worker thread; all blocking file I/O for a submission happens here.
+
+        Args:
+            files: Uploaded files, already validated by extension
+            job_dir: Job directory to create
+            safe_filenames: Sanitized destination name for each upload
+
+        Returns:
+            Size in bytes of each written file
+
+        Raises:
+            HTTPException: If a file is empty or the total size exceeds MAX_UPLOAD_SIZE
+        """
+        job_dir.mkdir(parents=True, exist_ok=True)
+
+        file_sizes = []
+        total_size = 0
+        for upload_file, safe_filename in zip(files, safe_filenames):
+            file_size = SubmissionController._copy_upload(
+                upload_file.file, job_dir / safe_filename, MAX_UPLOAD_SIZE - total_size
+            )
+            total_size += file_size
+            if total_size > MAX_UPLOAD_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Total file size exceeds {MAX_UPLOAD_SIZE / (1024 * 1024)}MB limit.",
+                )
+
+            # Validate individual file isn't empty
+            if file_size == 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File '{upload_file.filename}' is empty.",
+                )
+
+            file_sizes.append(file_size)
+
+        return file_sizes
+
+    @staticmethod
+    async def _save_uploaded_files(
         files: List[UploadFile], job_id: str
     ) -> tuple[str, List[FileMetadata]]:
         """
@@ -92,75 +184,72 @@ class SubmissionController:
                 detail=f"Too many files. Maximum {MAX_FILES_PER_SUBMISSION} files allowed.",
             )
 
-        # Create job directory
-        job_dir = os.path.join(EXECUTOR_JOBS_DIR, job_id)
-        os.makedirs(job_dir, exist_ok=True)
+        # Validate extensions before touching the disk
+        for upload_file in files:
+            if not SubmissionController._validate_file_extension(upload_file.filename):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File extension not allowed for '{upload_file.filename}'. Allowed: {_ALLOWED_EXTENSIONS_TEXT}",
+                )
 
-        file_metadata_list = []
-        total_size = 0
+        job_dir = Path(EXECUTOR_JOBS_DIR) / job_id
+        safe_filenames = [
+            SubmissionController._sanitize_filename(upload_file.filename) for upload_file in files
+        ]
 
         try:
-            for upload_file in files:
-                # Read file content
-                content = upload_file.file.read()
-                file_size = len(content)
-
-                # Validate individual file isn't empty
-                if file_size == 0:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"File '{upload_file.filename}' is empty.",
-                    )
-
-                # Check cumulative size
-                total_size += file_size
-                if total_size > MAX_UPLOAD_SIZE:
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"Total file size exceeds {MAX_UPLOAD_SIZE / (1024 * 1024)}MB limit.",
-                    )
-
-                # Validate extension
-                if not SubmissionController._validate_file_extension(upload_file.filename):
-                    raise HTTPException(
-                        status_code=400,
-                        detail=f"File extension not allowed for '{upload_file.filename}'. Allowed: {', '.join(ALLOWED_EXTENSIONS)}",
-                    )
-
-                # Sanitize filename
-                safe_filename = SubmissionController._sanitize_filename(upload_file.filename)
-
-                # Save file
-                file_path = os.path.join(job_dir, safe_filename)
-                with open(file_path, "wb") as f:
-                    f.write(content)
-
-                # Store metadata
-                file_metadata_list.append(
-                    FileMetadata(
-                        filename=safe_filename,
-                        size=file_size,
-                        mime_type=upload_file.content_type,
-                    )
+            # Write every file in a single threadpool hop rather than one per file
+            file_sizes = await run_in_threadpool(
+                SubmissionController._write_uploads, files, job_dir, safe_filenames
+            )
+
+            file_metadata_list = [
+                FileMetadata(
+                    filename=safe_filename,
+                    size=file_size,
+                    mime_type=upload_file.content_type,
                 )
+                for upload_file, safe_filename, file_size in zip(files, safe_filenames, file_sizes)
+            ]
 
-            return job_dir, file_metadata_list
+            return str(job_dir), file_metadata_list
 
         except HTTPException:
             # Clean up directory on validation failure
-            if os.path.exists(job_dir):
-                shutil.rmtree(job_dir)
+            shutil.rmtree(job_dir, ignore_errors=True)
             raise
         except Exception as e:
             # Clean up directory on any error
-            if os.path.exists(job_dir):
-                shutil.rmtree(job_dir)
+            shutil.rmtree(job_dir, ignore_errors=True)
             raise HTTPException(status_code=500, detail=f"Failed to save files: {str(e)}")
 
     @staticmethod
-    def submit_code(
+    def _language_error(language: str, compiler: Optional[Compiler]) -> HTTPException:
+        """
+        Explain why a submission for the given language was rejected.
+
+        Args:
+            language: The requested language (compiler ID)
+            compiler: The compiler row, or None if it doesn't exist
+
+        Returns:
+            HTTPException describing the rejection
+        """
+        if not compiler:
+            return HTTPException(status_code=400, detail=f"Language '{language}' not found")
+
+        if not compiler.enabled:
+            return HTTPException(status_code=400, detail=f"Language '{language}' is disabled")
+
+        return HTTPException(
+            status_code=400,
+            detail=f"Language '{language}' is not ready (status: {compiler.build_status})",
+        )
+
+    @staticmethod
+    async def submit_code(
         submission: SubmissionRequest,
-        db: Session,
+        db: AsyncSession,
         files: Optional[List[UploadFile]] = None,
     ) -> Dict[str, Any]:
         """
@@ -176,87 +265,139 @@ class SubmissionController:
         Raises:
             HTTPException: If language not found, disabled, or not ready
         """
-        job_id = str(uuid.uuid4())
-
-        # Validate language exists and is ready
-        compiler = db.query(Compiler).filter(Compiler.id == submission.language).first()
-
-        if not compiler:
-            raise HTTPException(
-                status_code=400, detail=f"Language '{submission.language}' not found"
-            )
-
-        if not compiler.enabled:
-            raise HTTPException(
-                status_code=400, detail=f"Language '{submission.language}' is disabled"
-            )
-
-        if compiler.build_status != "ready":
-            raise HTTPException(
-                status_code=400,
-                detail=f"Language '{submission.language}' is not ready (status: {compiler.build_status})",
-            )
+        job_uuid = uuid.uuid4()
+        job_id = str(job_uuid)
 
         # Handle file uploads if provided
         files_directory = None
+        uploaded_files = None
         uploaded_files_metadata = None
 
         if files and len(files) > 0:
-            files_directory, file_metadata_list = SubmissionController._save_uploaded_files(
+            files_directory, file_metadata_list = await SubmissionController._save_uploaded_files(
                 files, job_id
             )
-            uploaded_files_metadata = json.dumps([fm.dict() for fm in file_metadata_list])
-
-        # Create job entry in database
-        new_submission = Submission(
-            job_id=job_id,
-            code=submission.code,
-            language=submission.language,
-            status="PENDING",
-            uploaded_files=uploaded_files_metadata,
-            files_directory=files_directory,
+            # Serialized straight from the models by pydantic-core, no dict round trip
+            uploaded_files_metadata = _FILE_METADATA_LIST.dump_json(file_metadata_list).decode()
+            uploaded_files = _FILE_METADATA_LIST.dump_python(file_metadata_list)
+
+        # Create the job entry only if the language is enabled and ready, in one round trip
+        language_ready = select(
+            literal(job_uuid, Submission.job_id.type),
+            literal(submission.code, Submission.code.type),
+            Compiler.id,
+            literal("PENDING", Submission.status.type),
+            literal(uploaded_files_metadata, Submission.uploaded_files.type),
+            literal(files_directory, Submission.files_directory.type),
+        ).where(
+            Compiler.id == submission.language,
+            Compiler.enabled == True,
+            Compiler.build_status == "ready",
         )
-        db.add(new_submission)
-        db.commit()
+        stmt = (
+            insert(Submission)
+            .from_select(_SUBMISSION_INSERT_COLUMNS, language_ready)
+            .returning(Submission.job_id)
+        )
+        if (await db.execute(stmt)).scalar_one_or_none() is None:
+            if files_directory:
+                shutil.rmtree(files_directory, ignore_errors=True)
+            # Only the failure path pays for a second query, to explain the rejection
+            compiler = await db.scalar(select(Compiler).where(Compiler.id == submission.language))
+            raise SubmissionController._language_error(submission.language, compiler)
+        await db.commit()
 
         # Create job payload for the queue
         job_payload = {"job_id": job_id, "code": submission.code, "language": submission.language}
 
-        # Push job to Redis queue
-        redis_conn = get_redis_connection()
-        redis_conn.lpush(REDIS_QUEUE_NAME, json.dumps(job_payload))
+        # Seed the result cache with the PENDING state; the worker clears it on pick-up
+        pending_result = {
+            "status": "PENDING",
+            "stdout": None,
+            "stderr": None,
+            "completed_at": None,
+            "uploaded_files": uploaded_files,
+        }
+
+        # Hand the job to the batched Redis enqueuer
+        await enqueue_job(job_id, dump_json(job_payload), dump_json(pending_result))
 
         return {"message": "Job submitted", "job_id": job_id}
 
     @staticmethod
-    def get_results(job_id: str, db: Session) -> Dict[str, Any]:
+    async def get_results(job_id: str, db: AsyncSession, wait_ms: int = 0) -> Response:
         """
-        Retrieve submission results.
+        Retrieve submission results, optionally long-polling until the job finishes.
 
         Args:
             job_id: The job identifier
             db: Database session
+            wait_ms: Milliseconds to wait for an unfinished job to finish before
+                returning its current status; 0 returns immediately
 
         Returns:
-            Dictionary with status and output information
+            JSON response with status and output information
         """
-        submission = db.query(Submission).filter(Submission.job_id == job_id).first()
+        if wait_ms <= 0:
+            body = await SubmissionController._load_results(job_id, db)
+            return Response(content=body, media_type="application/json")
+
+        # Watch before the first lookup so a completion in between still wakes us
+        with watch_job(job_id) as finished:
+            body = await SubmissionController._load_results(job_id, db)
+            status = load_json(body)["status"]
+            if status not in TERMINAL_JOB_STATUSES and status != "NOT_FOUND":
+                # Give the pooled connection back while waiting
+                await db.close()
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(finished.wait(), wait_ms / 1000)
+                body = await SubmissionController._load_results(job_id, db)
+
+        return Response(content=body, media_type="application/json")
+
+    @staticmethod
+    async def _load_results(job_id: str, db: AsyncSession) -> bytes:
+        """
+        Look up the current results of a submission as encoded JSON.
+
+        Finished jobs never change, so their encoded results are cached in Redis
+        and repeated polls for them skip the database and JSON encoding.
+
+        Args:
+            job_id: The job identifier
+            db: Database session
+
+        Returns:
+            JSON body with status and output information
+        """
+        redis_conn = get_redis_connection()
+        result_key = JOB_RESULT_KEY.format(job_id)
+        cached = await redis_conn.get(result_key)
+        if cached is not None:
+            return cached
+
+        submission = await db.scalar(_GET_SUBMISSION, {"job_id": job_id})
 
         if not submission:
-            return {"status": "NOT_FOUND"}
+            return _NOT_FOUND_RESULT
 
         # Parse uploaded files metadata if present
         uploaded_files = None
         if submission.uploaded_files:
             try:
-                uploaded_files = json.loads(submission.uploaded_files)
-            except json.JSONDecodeError:
+                uploaded_files = load_json(submission.uploaded_files)
+            except ValueError:
                 uploaded_files = None
 
-        return {
+        body = dump_json({
             "status": submission.status,
             "stdout": submission.output_stdout,
             "stderr": submission.output_stderr,
             "completed_at": submission.completed_at,
             "uploaded_files": uploaded_files,
-        }
+        })
+
+        if submission.status in TERMINAL_JOB_STATUSES:
+            await redis_conn.set(result_key, body, ex=JOB_RESULT_CACHE_TTL)
+
+        return body
@@ -1,20 +1,65 @@
 """Controller for handling Dockerfile template business logic."""
-import json
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from fastapi import HTTPException
+from typing import Optional
+from sqlalchemy import Row, bindparam, delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, Response
 
 from models.database import DockerfileTemplate
-from models.schemas import CreateTemplateRequest, TemplateResponse
+from models.schemas import CreateTemplateRequest
+from config import (
+    get_redis_connection,
+    get_cached_response,
+    cache_response,
+    TEMPLATE_CACHE_KEY,
+    CATALOG_CACHE_VERSION_KEY,
+)
+from serialization import dump_json
+
+# Columns rendered by TemplateResponse, in schema field order
+_RESPONSE_COLUMNS = (
+    DockerfileTemplate.id,
+    DockerfileTemplate.name,
+    DockerfileTemplate.description,
+    DockerfileTemplate.category,
+    DockerfileTemplate.dockerfile_template,
+    DockerfileTemplate.default_run_command,
+    DockerfileTemplate.tags,
+    DockerfileTemplate.icon,
+    DockerfileTemplate.author,
+    DockerfileTemplate.is_official,
+    DockerfileTemplate.created_at,
+    DockerfileTemplate.updated_at,
+)
+
+# Columns rendered by TemplateSummaryResponse
+_SUMMARY_COLUMNS = (
+    DockerfileTemplate.id,
+    DockerfileTemplate.name,
+    DockerfileTemplate.category,
+    DockerfileTemplate.icon,
+    DockerfileTemplate.is_official,
+    DockerfileTemplate.tags,
+)
+
+# Statements for the per-template endpoints, built once at import
+_GET_TEMPLATE = select(*_RESPONSE_COLUMNS).where(
+    DockerfileTemplate.id == bindparam("template_id")
+)
+_DELETE_TEMPLATE = (
+    delete(DockerfileTemplate)
+    .where(DockerfileTemplate.id == bindparam("template_id"))
+    .returning(DockerfileTemplate.id)
+)
 
 
 class TemplateController:
     """Handles business logic for Dockerfile template management."""
 
     @staticmethod
-    def create_template(
-        template_req: CreateTemplateRequest, db: Session
-    ) -> TemplateResponse:
+    async def create_template(
+        template_req: CreateTemplateRequest, db: AsyncSession
+    ) -> Response:
         """
         Create a new Dockerfile template.
 
@@ -23,105 +68,128 @@ class TemplateController:
             db: Database session
 
         Returns:
-            TemplateResponse with the created template details
+            JSON response with the created template details
 
         Raises:
             HTTPException: If template ID already exists
         """
-        # Check if template ID already exists
-        existing = (
-            db.query(DockerfileTemplate)
-            .filter(DockerfileTemplate.id == template_req.id)
-            .first()
+        # Insert unless the ID is taken, reading back server defaults in the same statement
+        stmt = (
+            insert(DockerfileTemplate)
+            .values(
+                id=template_req.id,
+                name=template_req.name,
+                description=template_req.description,
+                category=template_req.category,
+                dockerfile_template=template_req.dockerfile_template,
+                default_run_command=template_req.default_run_command or None,
+                tags=template_req.tags or None,
+                icon=template_req.icon,
+                author=template_req.author,
+                is_official=template_req.is_official,
+            )
+            .on_conflict_do_nothing(index_elements=[DockerfileTemplate.id])
+            .returning(*_RESPONSE_COLUMNS)
         )
-        if existing:
+        new_template = (await db.execute(stmt)).one_or_none()
+        if new_template is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Template with id '{template_req.id}' already exists",
             )
 
-        # Create template
-        new_template = DockerfileTemplate(
-            id=template_req.id,
-            name=template_req.name,
-            description=template_req.description,
-            category=template_req.category,
-            dockerfile_template=template_req.dockerfile_template,
-            default_run_command=(
-                json.dumps(template_req.default_run_command)
-                if template_req.default_run_command
-                else None
-            ),
-            tags=json.dumps(template_req.tags) if template_req.tags else None,
-            icon=template_req.icon,
-            author=template_req.author,
-            is_official=template_req.is_official,
-        )
-
-        db.add(new_template)
-        db.commit()
-        db.refresh(new_template)
+        body = dump_json(TemplateController._to_dict(new_template))
+        await db.commit()
+        await get_redis_connection().incr(CATALOG_CACHE_VERSION_KEY.format(TEMPLATE_CACHE_KEY))
 
-        return TemplateController._to_response(new_template)
+        return Response(content=body, status_code=201, media_type="application/json")
 
     @staticmethod
-    def list_templates(
+    async def list_templates(
         category: Optional[str] = None,
         official_only: bool = False,
-        db: Session = None,
-    ) -> List[TemplateResponse]:
+        summary: bool = False,
+        tag: Optional[str] = None,
+        db: AsyncSession = None,
+    ) -> Response:
         """
         List all Dockerfile templates with optional filtering.
 
+        The serialized list is cached in Redis per filter combination.
+
         Args:
             category: Optional category filter
             official_only: Whether to show only official templates
+            summary: Whether to return only the summary columns
+            tag: Optional tag the template must carry
             db: Database session
 
         Returns:
-            List of TemplateResponse objects
+            JSON response with the list of templates
         """
-        query = db.query(DockerfileTemplate)
+        # Free-text filters are JSON-encoded so no two filter combinations share a field
+        cache_field = "list:" + dump_json([category, tag, official_only, summary]).decode()
+        cached, cache_version = await get_cached_response(TEMPLATE_CACHE_KEY, cache_field)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        stmt = select(*(_SUMMARY_COLUMNS if summary else _RESPONSE_COLUMNS))
 
         if category:
-            query = query.filter(DockerfileTemplate.category == category)
+            stmt = stmt.where(DockerfileTemplate.category == category)
+
+        if tag:
+            # JSONB containment, answered from the GIN index on tags
+            stmt = stmt.where(DockerfileTemplate.tags.contains([tag]))
 
         if official_only:
-            query = query.filter(DockerfileTemplate.is_official == True)
+            stmt = stmt.where(DockerfileTemplate.is_official == True)
+
+        stmt = stmt.order_by(DockerfileTemplate.name)
 
-        templates = query.order_by(DockerfileTemplate.name).all()
-        return [TemplateController._to_response(t) for t in templates]
+        rows = await db.execute(stmt)
+        if summary:
+            # Summary columns map 1:1 onto TemplateSummaryResponse
+            body = dump_json([row._asdict() for row in rows])
+        else:
+            # Rows are encoded straight to JSON, skipping ORM and Pydantic objects
+            body = dump_json([TemplateController._to_dict(row) for row in rows])
+        await cache_response(TEMPLATE_CACHE_KEY, cache_version, cache_field, body)
+        return Response(content=body, media_type="application/json")
 
     @staticmethod
-    def get_template(template_id: str, db: Session) -> TemplateResponse:
+    async def get_template(template_id: str, db: AsyncSession) -> Response:
         """
-        Get a specific Dockerfile template by ID.
+        Get a specific Dockerfile template by ID, serving it from Redis when cached.
 
         Args:
             template_id: The template ID
             db: Database session
 
         Returns:
-            TemplateResponse with the template details
+            JSON response with the template details
 
         Raises:
             HTTPException: If template not found
         """
-        template = (
-            db.query(DockerfileTemplate)
-            .filter(DockerfileTemplate.id == template_id)
-            .first()
-        )
+        cache_field = f"get:{template_id}"
+        cached, cache_version = await get_cached_response(TEMPLATE_CACHE_KEY, cache_field)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        template = (await db.execute(_GET_TEMPLATE, {"template_id": template_id})).one_or_none()
 
         if not template:
             raise HTTPException(
                 status_code=404, detail=f"Template '{template_id}' not found"
             )
 
-        return TemplateController._to_response(template)
+        body = dump_json(TemplateController._to_dict(template))
+        await cache_response(TEMPLATE_CACHE_KEY, cache_version, cache_field, body)
+        return Response(content=body, media_type="application/json")
 
     @staticmethod
-    def delete_template(template_id: str, db: Session) -> dict:
+    async def delete_template(template_id: str, db: AsyncSession) -> dict:
         """
         Delete a Dockerfile template.
 
@@ -135,48 +203,29 @@ class TemplateController:
         Raises:
             HTTPException: If template not found
         """
-        template = (
-            db.query(DockerfileTemplate)
-            .filter(DockerfileTemplate.id == template_id)
-            .first()
-        )
-
-        if not template:
+        result = await db.execute(_DELETE_TEMPLATE, {"template_id": template_id})
+        if result.scalar_one_or_none() is None:
             raise HTTPException(
                 status_code=404, detail=f"Template '{template_id}' not found"
             )
 
-        db.delete(template)
-        db.commit()
+        await db.commit()
+        await get_redis_connection().incr(CATALOG_CACHE_VERSION_KEY.format(TEMPLATE_CACHE_KEY))
 
         return {"message": f"Template '{template_id}' deleted successfully"}
 
     @staticmethod
-    def _to_response(template: DockerfileTemplate) -> TemplateResponse:
+    def _to_dict(row: Row) -> dict:
         """
-        Convert a DockerfileTemplate model to a TemplateResponse.
+        Convert a row of _RESPONSE_COLUMNS to a plain dict shaped like TemplateResponse.
 
         Args:
-            template: The DockerfileTemplate model instance
+            row: Result row selected with _RESPONSE_COLUMNS
 
         Returns:
-            TemplateResponse object
+            Dict ready for JSON encoding
         """
-        return TemplateResponse(
-            id=template.id,
-            name=template.name,
-            description=template.description,
-            category=template.category,
-            dockerfile_template=template.dockerfile_template,
-            default_run_command=(
-                json.loads(template.default_run_command)
-                if template.default_run_command
-                else None
-            ),
-            tags=json.loads(template.tags) if template.tags else None,
-            icon=template.icon,
-            author=template.author,
-            is_official=template.is_official,
-            created_at=template.created_at.isoformat(),
-            updated_at=template.updated_at.isoformat(),
-        )
+        data = row._asdict()
+        data["created_at"] = data["created_at"].isoformat()
+        data["updated_at"] = data["updated_at"].isoformat()
+        return data
@@ -1,34 +1,44 @@
 """Database configuration and session management."""
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncGenerator
 
-from config import DATABASE_URL
+from config import DATABASE_URL, DB_STATEMENT_TIMEOUT_MS
+from serialization import dump_json_str, load_json
 
 # Create engine with connection pooling
-engine = create_engine(
+engine = create_async_engine(
     DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True  # Verify connections before using
+    pool_size=20,
+    max_overflow=40,
+    pool_pre_ping=True,  # Verify connections before using
+    pool_recycle=1800,  # Replace connections before idle-kill timeouts on the server/LB
+    pool_use_lifo=True,  # Reuse the most recently returned connection first
+    json_serializer=dump_json_str,  # JSONB columns go through orjson
+    json_deserializer=load_json,
+    connect_args={
+        # asyncpg keeps server-side prepared statements per connection; room for every query shape
+        "prepared_statement_cache_size": 512,
+        # A runaway query fails instead of holding a pool slot indefinitely
+        "server_settings": {
+            "statement_timeout": str(DB_STATEMENT_TIMEOUT_MS),
+            "application_name": "yantra-api",
+        },
+    },
 )
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Session factory; objects stay loaded after commit so responses can be built from them
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function for FastAPI routes.
     Yields a database session and ensures it's closed after use.
 
     Usage:
         @app.get("/endpoint")
-        def my_endpoint(db: Session = Depends(get_db)):
+        async def my_endpoint(db: AsyncSession = Depends(get_db)):
             ...
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,8 +1,11 @@
 """Yantra API - Main application entry point."""
+import asyncio
 import uvicorn
 import logging
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse
 
 from config import (
     API_TITLE,
@@ -10,15 +13,82 @@ from config import (
     API_VERSION,
     API_CONTACT,
     API_LICENSE,
+    get_redis_connection,
+    close_redis_connections,
+    start_job_enqueuer,
+    stop_job_enqueuer,
+    start_job_event_listener,
+    stop_job_event_listener,
+    TEMPLATE_CACHE_KEY,
+    CATALOG_CACHE_VERSION_KEY,
 )
 from routers import submissions_router, compilers_router, templates_router
-from database import SessionLocal
-from templates import seed_templates
+from controllers import CompilerController
+from database import SessionLocal, engine
+from templates import seed_templates_once
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+async def seed_default_templates():
+    """Seed the default Dockerfile templates into the database."""
+    try:
+        logger.info("📦 Seeding Dockerfile templates...")
+        async with SessionLocal() as db:
+            results = await db.run_sync(seed_templates_once)
+
+        if results is None:
+            logger.info("⏭️  Templates already seeded by this or another API process")
+            return
+
+        if results["added"]:
+            logger.info(f"✅ Added {len(results['added'])} new templates: {', '.join(results['added'])}")
+        if results["updated"]:
+            logger.info(f"🔄 Updated {len(results['updated'])} existing templates")
+        if results["added"] or results["updated"]:
+            await get_redis_connection().incr(CATALOG_CACHE_VERSION_KEY.format(TEMPLATE_CACHE_KEY))
+        if results["skipped"]:
+            logger.info(f"⏭️  Skipped {len(results['skipped'])} existing templates")
+        if results["errors"]:
+            logger.error(f"❌ Errors seeding templates: {results['errors']}")
+
+        total_templates = len(results["added"]) + len(results["updated"]) + len(results["skipped"])
+        logger.info(f"🎉 Template seeding complete! Total templates available: {total_templates}")
+
+        # First start for this seed: build the compilers that came with the database
+        async with SessionLocal() as db:
+            queued = await CompilerController.queue_pending_builds(db)
+        if queued:
+            logger.info(f"🔨 Queued initial builds for {len(queued)} compilers: {', '.join(queued)}")
+
+    except Exception as e:
+        logger.error(f"❌ Failed to seed templates: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize application on startup and flush pending work on shutdown."""
+    logger.info("🚀 Yantra API starting up...")
+    app.state.redis = get_redis_connection()
+    # Seeding runs in the background so the API can serve requests right away
+    seed_task = app.state.seed_task = asyncio.create_task(seed_default_templates())
+    start_job_enqueuer()
+    start_job_event_listener()
+    logger.info("✨ Yantra API ready to serve requests!")
+
+    yield
+
+    seed_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await seed_task
+    await stop_job_event_listener()
+    await stop_job_enqueuer()
+    await close_redis_connections()
+    await engine.dispose()
+
+
 # Create FastAPI application with enhanced documentation
 app = FastAPI(
     title=API_TITLE,
@@ -28,6 +98,7 @@ app = FastAPI(
     license_info=API_LICENSE,
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
     openapi_tags=[
         {
             "name": "Submissions",
@@ -44,34 +115,8 @@ app = FastAPI(
     ],
 )
 
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize application on startup."""
-    logger.info("🚀 Yantra API starting up...")
-
-    # Seed Dockerfile templates
-    db = SessionLocal()
-    try:
-        logger.info("📦 Seeding Dockerfile templates...")
-        results = seed_templates(db)
-
-        if results["added"]:
-            logger.info(f"✅ Added {len(results['added'])} new templates: {', '.join(results['added'])}")
-        if results["skipped"]:
-            logger.info(f"⏭️  Skipped {len(results['skipped'])} existing templates")
-        if results["errors"]:
-            logger.error(f"❌ Errors seeding templates: {results['errors']}")
-
-        total_templates = len(results["added"]) + len(results["skipped"])
-        logger.info(f"🎉 Template seeding complete! Total templates available: {total_templates}")
-
-    except Exception as e:
-        logger.error(f"❌ Failed to seed templates: {str(e)}")
-    finally:
-        db.close()
-
-    logger.info("✨ Yantra API ready to serve requests!")
+# Catalog listings repeat a lot of Dockerfile boilerplate and compress well
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=4)
 
 
 @app.get("/", include_in_schema=False)
@@ -86,6 +131,14 @@ async def health_check():
     return {"status": "healthy", "service": "yantra-api"}
 
 
+@app.get("/readyz", tags=["Health"])
+async def readiness_check(request: Request):
+    """Readiness endpoint; returns 503 until startup template seeding has finished."""
+    if not request.app.state.seed_task.done():
+        return JSONResponse(status_code=503, content={"status": "seeding", "service": "yantra-api"})
+    return {"status": "ready", "service": "yantra-api"}
+
+
 # Include routers
 app.include_router(submissions_router)
 app.include_router(compilers_router)
@@ -4,9 +4,13 @@ from .schemas import (
     FileMetadata,
     SubmissionRequest,
     SubmissionResponse,
+    JobSubmittedResponse,
+    MessageResponse,
     CreateCompilerRequest,
     UpdateCompilerRequest,
     CompilerResponse,
+    CompilerSummaryResponse,
+    BuildLogsResponse,
 )
 
 __all__ = [
@@ -16,7 +20,11 @@ __all__ = [
     "FileMetadata",
     "SubmissionRequest",
     "SubmissionResponse",
+    "JobSubmittedResponse",
+    "MessageResponse",
     "CreateCompilerRequest",
     "UpdateCompilerRequest",
     "CompilerResponse",
+    "CompilerSummaryResponse",
+    "BuildLogsResponse",
 ]
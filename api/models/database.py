@@ -1,6 +1,6 @@
 """SQLAlchemy database models for Yantra."""
 from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, TIMESTAMP
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 import uuid
@@ -16,7 +16,7 @@ class Compiler(Base):
     id = Column(String(50), primary_key=True)
     name = Column(String(100), nullable=False)
     dockerfile_content = Column(Text, nullable=False)
-    run_command = Column(Text, nullable=False)  # JSON string
+    run_command = Column(JSONB, nullable=False)  # e.g. ["python", "-"]
     image_tag = Column(String(255), nullable=False)
     version = Column(String(50))
     memory_limit = Column(String(20), default="512m")
@@ -58,10 +58,21 @@ class DockerfileTemplate(Base):
     description = Column(Text, nullable=False)
     category = Column(String(50), nullable=False)  # language, framework, tool, os
     dockerfile_template = Column(Text, nullable=False)
-    default_run_command = Column(Text)  # JSON string
-    tags = Column(Text)  # JSON array for search/filtering
+    # none_as_null stores None as SQL NULL rather than the JSON 'null' value
+    default_run_command = Column(JSONB(none_as_null=True))  # e.g. ["python", "-"]
+    tags = Column(JSONB(none_as_null=True))  # Array of tags for search/filtering
     icon = Column(String(50))  # emoji or icon identifier
     author = Column(String(100), default="yantra")
     is_official = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class SeedMeta(Base):
+    """Records which version of built-in seed data has been applied."""
+
+    __tablename__ = "seed_meta"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False)
+    seeded_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -31,6 +31,19 @@ class SubmissionResponse(BaseModel):
     uploaded_files: Optional[List[FileMetadata]] = None
 
 
+class JobSubmittedResponse(BaseModel):
+    """Schema for an accepted code submission."""
+
+    message: str
+    job_id: str
+
+
+class MessageResponse(BaseModel):
+    """Schema for a plain confirmation message."""
+
+    message: str
+
+
 # Compiler Schemas
 class CreateCompilerRequest(BaseModel):
     """Schema for creating a new compiler."""
@@ -83,6 +96,37 @@ class CompilerResponse(BaseModel):
         from_attributes = True
 
 
+class CompilerSummaryResponse(BaseModel):
+    """Schema for a compiler in summary listings (no Dockerfile content)."""
+
+    id: str
+    name: str
+    run_command: List[str]
+    image_tag: str
+    version: Optional[str]
+    memory_limit: str
+    cpu_limit: str
+    timeout_seconds: int
+    enabled: bool
+    build_status: str
+    build_error: Optional[str]
+    created_at: str
+    updated_at: str
+    built_at: Optional[str]
+
+
+class BuildLogsResponse(BaseModel):
+    """Schema for a compiler's build logs."""
+
+    compiler_id: str
+    compiler_name: str
+    build_status: str
+    build_logs: str
+    build_error: Optional[str]
+    built_at: Optional[str]
+    updated_at: str
+
+
 # Template Schemas
 class TemplateResponse(BaseModel):
     """Schema for Dockerfile template response."""
@@ -104,6 +148,17 @@ class TemplateResponse(BaseModel):
         from_attributes = True
 
 
+class TemplateSummaryResponse(BaseModel):
+    """Schema for a Dockerfile template in summary listings."""
+
+    id: str
+    name: str
+    category: str
+    icon: Optional[str] = None
+    is_official: bool
+    tags: Optional[List[str]] = None
+
+
 class CreateTemplateRequest(BaseModel):
     """Schema for creating a new Dockerfile template."""
 
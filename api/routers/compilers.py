@@ -1,13 +1,16 @@
 """API routes for compiler management endpoints."""
-from typing import List
+from typing import List, Union
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from models.schemas import (
     CreateCompilerRequest,
     UpdateCompilerRequest,
     CompilerResponse,
+    CompilerSummaryResponse,
+    BuildLogsResponse,
+    MessageResponse,
 )
 from controllers.compiler_controller import CompilerController
 
@@ -43,25 +46,29 @@ router = APIRouter(
     """,
     response_description="The created compiler configuration",
 )
-async def create_compiler(compiler_req: CreateCompilerRequest, db: Session = Depends(get_db)):
+async def create_compiler(compiler_req: CreateCompilerRequest, db: AsyncSession = Depends(get_db)):
     """Create a new compiler and queue it for image building."""
-    return CompilerController.create_compiler(compiler_req, db)
+    return await CompilerController.create_compiler(compiler_req, db)
 
 
 @router.get(
     "",
-    response_model=List[CompilerResponse],
+    response_model=Union[List[CompilerResponse], List[CompilerSummaryResponse]],
     summary="List all compilers",
     description="""
     Retrieve a list of all compiler configurations.
 
-    Use the `enabled_only` query parameter to filter for only enabled compilers.
+    Use query parameters to filter:
+    - `enabled_only`: Filter for only enabled compilers
+    - `summary`: Omit `dockerfile_content` from each compiler
     """,
     response_description="List of compiler configurations",
 )
-async def list_compilers(enabled_only: bool = False, db: Session = Depends(get_db)):
+async def list_compilers(
+    enabled_only: bool = False, summary: bool = False, db: AsyncSession = Depends(get_db)
+):
     """List all compilers, optionally filtering for enabled ones only."""
-    return CompilerController.list_compilers(enabled_only, db)
+    return await CompilerController.list_compilers(enabled_only, summary, db)
 
 
 @router.get(
@@ -76,9 +83,9 @@ async def list_compilers(enabled_only: bool = False, db: Session = Depends(get_d
     """,
     response_description="Compiler configuration details",
 )
-async def get_compiler(compiler_id: str, db: Session = Depends(get_db)):
+async def get_compiler(compiler_id: str, db: AsyncSession = Depends(get_db)):
     """Get detailed information about a specific compiler."""
-    return CompilerController.get_compiler(compiler_id, db)
+    return await CompilerController.get_compiler(compiler_id, db)
 
 
 @router.put(
@@ -98,14 +105,15 @@ async def get_compiler(compiler_id: str, db: Session = Depends(get_db)):
     response_description="Updated compiler configuration",
 )
 async def update_compiler(
-    compiler_id: str, update: UpdateCompilerRequest, db: Session = Depends(get_db)
+    compiler_id: str, update: UpdateCompilerRequest, db: AsyncSession = Depends(get_db)
 ):
     """Update a compiler and trigger rebuild if necessary."""
-    return CompilerController.update_compiler(compiler_id, update, db)
+    return await CompilerController.update_compiler(compiler_id, update, db)
 
 
 @router.delete(
     "/{compiler_id}",
+    response_model=MessageResponse,
     summary="Delete a compiler",
     description="""
     Delete a compiler configuration and queue cleanup of its Docker image.
@@ -116,13 +124,14 @@ async def update_compiler(
     """,
     response_description="Deletion confirmation message",
 )
-async def delete_compiler(compiler_id: str, db: Session = Depends(get_db)):
+async def delete_compiler(compiler_id: str, db: AsyncSession = Depends(get_db)):
     """Delete a compiler and queue cleanup of its Docker image."""
-    return CompilerController.delete_compiler(compiler_id, db)
+    return await CompilerController.delete_compiler(compiler_id, db)
 
 
 @router.post(
     "/{compiler_id}/build",
+    response_model=MessageResponse,
     summary="Trigger manual rebuild",
     description="""
     Manually trigger a rebuild of the compiler's Docker image.
@@ -136,13 +145,14 @@ async def delete_compiler(compiler_id: str, db: Session = Depends(get_db)):
     """,
     response_description="Build trigger confirmation",
 )
-async def trigger_build(compiler_id: str, db: Session = Depends(get_db)):
+async def trigger_build(compiler_id: str, db: AsyncSession = Depends(get_db)):
     """Manually trigger a rebuild of the compiler's Docker image."""
-    return CompilerController.trigger_build(compiler_id, db)
+    return await CompilerController.trigger_build(compiler_id, db)
 
 
 @router.get(
     "/{compiler_id}/logs",
+    response_model=BuildLogsResponse,
     summary="Get build logs",
     description="""
     Retrieve the full Docker build output logs for a compiler.
@@ -152,6 +162,6 @@ async def trigger_build(compiler_id: str, db: Session = Depends(get_db)):
     """,
     response_description="Build logs",
 )
-async def get_build_logs(compiler_id: str, db: Session = Depends(get_db)):
+async def get_build_logs(compiler_id: str, db: AsyncSession = Depends(get_db)):
     """Get the full build logs for a compiler."""
-    return CompilerController.get_build_logs(compiler_id, db)
+    return await CompilerController.get_build_logs(compiler_id, db)
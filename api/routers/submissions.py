@@ -1,10 +1,11 @@
 """API routes for code submission endpoints."""
-from fastapi import APIRouter, Depends, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
+from config import MAX_RESULT_WAIT_MS
 from database import get_db
-from models.schemas import SubmissionRequest
+from models.schemas import SubmissionRequest, JobSubmittedResponse, SubmissionResponse
 from controllers.submission_controller import SubmissionController
 
 router = APIRouter(
@@ -19,6 +20,7 @@ router = APIRouter(
 
 @router.post(
     "",
+    response_model=JobSubmittedResponse,
     summary="Submit code for execution",
     description="""
     Submit code to be executed in an isolated Docker container with optional file uploads.
@@ -51,17 +53,18 @@ async def submit_code(
     code: str = Form(..., description="Source code to execute"),
     language: str = Form(..., description="Programming language identifier"),
     files: Optional[List[UploadFile]] = File(None, description="Optional files to upload"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Submit code for execution with optional file uploads."""
     # Create SubmissionRequest from form data
     submission = SubmissionRequest(code=code, language=language)
 
-    return SubmissionController.submit_code(submission, db, files)
+    return await SubmissionController.submit_code(submission, db, files)
 
 
 @router.get(
     "/results/{job_id}",
+    response_model=SubmissionResponse,
     summary="Get execution results",
     description="""
     Retrieve the execution results for a submitted job.
@@ -73,9 +76,18 @@ async def submit_code(
     - `FAILED`: Execution failed
     - `TIMEOUT`: Execution exceeded time limit
     - `NOT_FOUND`: Job ID doesn't exist
+
+    Pass `wait_ms` to long-poll: if the job hasn't finished yet, the request
+    waits up to that many milliseconds for it to finish before responding.
     """,
     response_description="Execution status and output",
 )
-async def get_results(job_id: str, db: Session = Depends(get_db)):
+async def get_results(
+    job_id: str,
+    wait_ms: int = Query(
+        0, ge=0, le=MAX_RESULT_WAIT_MS, description="Milliseconds to wait for the job to finish"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
     """Get the execution status and results for a job."""
-    return SubmissionController.get_results(job_id, db)
+    return await SubmissionController.get_results(job_id, db, wait_ms)
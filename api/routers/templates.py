@@ -1,10 +1,15 @@
 """API routes for Dockerfile template endpoints."""
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
-from models.schemas import CreateTemplateRequest, TemplateResponse
+from models.schemas import (
+    CreateTemplateRequest,
+    MessageResponse,
+    TemplateResponse,
+    TemplateSummaryResponse,
+)
 from controllers.template_controller import TemplateController
 
 router = APIRouter(
@@ -31,32 +36,36 @@ router = APIRouter(
     response_description="The created template",
 )
 async def create_template(
-    template_req: CreateTemplateRequest, db: Session = Depends(get_db)
+    template_req: CreateTemplateRequest, db: AsyncSession = Depends(get_db)
 ):
     """Create a new Dockerfile template."""
-    return TemplateController.create_template(template_req, db)
+    return await TemplateController.create_template(template_req, db)
 
 
 @router.get(
     "",
-    response_model=List[TemplateResponse],
+    response_model=Union[List[TemplateResponse], List[TemplateSummaryResponse]],
     summary="List all Dockerfile templates",
     description="""
     Retrieve a list of all available Dockerfile templates.
 
     Use query parameters to filter:
     - `category`: Filter by category (language, framework, tool, os)
+    - `tag`: Show only templates carrying this tag
     - `official_only`: Show only official templates
+    - `summary`: Return only id, name, category, icon, official flag and tags
     """,
     response_description="List of Dockerfile templates",
 )
 async def list_templates(
     category: Optional[str] = None,
     official_only: bool = False,
-    db: Session = Depends(get_db),
+    summary: bool = False,
+    tag: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
     """List all templates with optional filtering."""
-    return TemplateController.list_templates(category, official_only, db)
+    return await TemplateController.list_templates(category, official_only, summary, tag, db)
 
 
 @router.get(
@@ -71,13 +80,14 @@ async def list_templates(
     """,
     response_description="Template details",
 )
-async def get_template(template_id: str, db: Session = Depends(get_db)):
+async def get_template(template_id: str, db: AsyncSession = Depends(get_db)):
     """Get detailed information about a specific template."""
-    return TemplateController.get_template(template_id, db)
+    return await TemplateController.get_template(template_id, db)
 
 
 @router.delete(
     "/{template_id}",
+    response_model=MessageResponse,
     summary="Delete a template",
     description="""
     Delete a Dockerfile template.
@@ -86,6 +96,6 @@ async def get_template(template_id: str, db: Session = Depends(get_db)):
     """,
     response_description="Deletion confirmation message",
 )
-async def delete_template(template_id: str, db: Session = Depends(get_db)):
+async def delete_template(template_id: str, db: AsyncSession = Depends(get_db)):
     """Delete a Dockerfile template."""
-    return TemplateController.delete_template(template_id, db)
+    return await TemplateController.delete_template(template_id, db)
@@ -0,0 +1,17 @@
+"""JSON helpers backed by orjson."""
+from typing import Any
+
+import orjson
+
+
+def dump_json(obj: Any) -> bytes:
+    """Serialize an object to compact JSON bytes."""
+    return orjson.dumps(obj)
+
+
+load_json = orjson.loads
+
+
+def dump_json_str(obj: Any) -> str:
+    """Serialize an object to a JSON string, for storage in TEXT columns."""
+    return dump_json(obj).decode()
@@ -1,4 +1,4 @@
 """Template definitions and seeding utilities."""
-from .seed import seed_templates
+from .seed import seed_templates, seed_templates_once
 
-__all__ = ["seed_templates"]
+__all__ = ["seed_templates", "seed_templates_once"]
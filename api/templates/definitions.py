@@ -1,5 +1,8 @@
 """Dockerfile template definitions for popular programming languages."""
 
+# Bump whenever LANGUAGE_TEMPLATES changes; the next start upserts every definition
+SEED_VERSION = 1
+
 LANGUAGE_TEMPLATES = [
     {
         "id": "python-3.12",
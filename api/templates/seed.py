@@ -1,24 +1,101 @@
 """Template seeding logic for initializing default Dockerfile templates."""
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 
-from models.database import DockerfileTemplate
-from .definitions import LANGUAGE_TEMPLATES
+from models.database import DockerfileTemplate, SeedMeta
+from .definitions import LANGUAGE_TEMPLATES, SEED_VERSION
 
+# Advisory lock key serializing template seeding across API processes
+_SEED_LOCK_KEY = 0x5EED
 
-def seed_templates(db: Session) -> Dict[str, Any]:
+
+def seed_templates_once(db: Session) -> Optional[Dict[str, Any]]:
+    """
+    Seed default templates unless another process is already doing it or
+    the current SEED_VERSION has already been applied.
+
+    A database that was never seeded only gets the missing templates; one
+    seeded at an older SEED_VERSION has every definition upserted, so changed
+    templates are applied too. Everything, including the recorded version,
+    happens in one transaction, and the transaction-scoped advisory lock is
+    held until its commit.
+
+    Args:
+        db: SQLAlchemy database session
+
+    Returns:
+        Seeding results (added, skipped, updated, errors), or None if skipped
+    """
+    # Another process is seeding right now
+    if not db.scalar(select(func.pg_try_advisory_xact_lock(_SEED_LOCK_KEY))):
+        db.rollback()
+        return None
+
+    applied = db.scalar(select(SeedMeta.version).where(SeedMeta.name == "templates"))
+    if applied == SEED_VERSION:
+        db.rollback()
+        return None
+
+    if applied is None:
+        results = seed_templates(db, commit=False)
+    else:
+        results = update_existing_templates(db, commit=False)
+    # A failed statement already rolled back; the version is retried on the next start
+    if results["errors"]:
+        return results
+
+    # Recorded in the same transaction as the templates themselves
+    db.execute(
+        insert(SeedMeta)
+        .values(name="templates", version=SEED_VERSION)
+        .on_conflict_do_update(
+            index_elements=[SeedMeta.name],
+            set_={"version": SEED_VERSION, "seeded_at": func.now()},
+        )
+    )
+    db.commit()
+    return results
+
+
+def _template_row(template_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the dockerfile_templates column values for one template definition.
+
+    Args:
+        template_data: Template definition from LANGUAGE_TEMPLATES
+
+    Returns:
+        Dictionary of column values
+    """
+    return {
+        "id": template_data["id"],
+        "name": template_data["name"],
+        "description": template_data["description"],
+        "category": template_data["category"],
+        "dockerfile_template": template_data["dockerfile_template"],
+        "default_run_command": template_data.get("default_run_command") or None,
+        "tags": template_data.get("tags") or None,
+        "icon": template_data.get("icon"),
+        "author": template_data.get("author", "yantra"),
+        "is_official": template_data.get("is_official", True),
+    }
+
+
+def seed_templates(db: Session, commit: bool = True) -> Dict[str, Any]:
     """
     Seed default Dockerfile templates into the database.
 
     This function is idempotent - it will:
     - Skip templates that already exist (by ID)
     - Insert new templates
-    - Optionally update existing templates if they've changed
+
+    All templates go in with a single multi-row INSERT ... ON CONFLICT DO NOTHING.
 
     Args:
         db: SQLAlchemy database session
+        commit: Commit the inserted templates; pass False to leave that to the caller
 
     Returns:
         Dictionary with seeding results (added, skipped, errors)
@@ -30,85 +107,44 @@ def seed_templates(db: Session) -> Dict[str, Any]:
         "errors": [],
     }
 
-    for template_data in LANGUAGE_TEMPLATES:
-        try:
-            template_id = template_data["id"]
-
-            # Check if template already exists
-            existing_template = (
-                db.query(DockerfileTemplate)
-                .filter(DockerfileTemplate.id == template_id)
-                .first()
-            )
-
-            if existing_template:
-                # Template exists - optionally update it
-                # For now, we'll skip to avoid overwriting user modifications
-                results["skipped"].append(template_id)
-                continue
-
-            # Create new template
-            template = DockerfileTemplate(
-                id=template_data["id"],
-                name=template_data["name"],
-                description=template_data["description"],
-                category=template_data["category"],
-                dockerfile_template=template_data["dockerfile_template"],
-                default_run_command=(
-                    json.dumps(template_data["default_run_command"])
-                    if template_data.get("default_run_command")
-                    else None
-                ),
-                tags=(
-                    json.dumps(template_data["tags"])
-                    if template_data.get("tags")
-                    else None
-                ),
-                icon=template_data.get("icon"),
-                author=template_data.get("author", "yantra"),
-                is_official=template_data.get("is_official", True),
-            )
-
-            db.add(template)
-            results["added"].append(template_id)
-
-        except IntegrityError as e:
-            # This shouldn't happen due to our check above, but handle it anyway
-            db.rollback()
-            results["errors"].append({
-                "template_id": template_id,
-                "error": f"Integrity error: {str(e)}"
-            })
-        except Exception as e:
-            db.rollback()
-            results["errors"].append({
-                "template_id": template_id,
-                "error": str(e)
-            })
-
-    # Commit all changes at once
+    stmt = (
+        insert(DockerfileTemplate)
+        .values([_template_row(template_data) for template_data in LANGUAGE_TEMPLATES])
+        .on_conflict_do_nothing(index_elements=[DockerfileTemplate.id])
+        .returning(DockerfileTemplate.id)
+    )
+
     try:
-        if results["added"]:
+        added = set(db.scalars(stmt))
+        if added and commit:
             db.commit()
     except Exception as e:
         db.rollback()
         results["errors"].append({
-            "template_id": "commit",
-            "error": f"Failed to commit changes: {str(e)}"
+            "template_id": "batch",
+            "error": f"Failed to insert templates: {str(e)}"
         })
+        return results
+
+    for template_data in LANGUAGE_TEMPLATES:
+        bucket = "added" if template_data["id"] in added else "skipped"
+        results[bucket].append(template_data["id"])
 
     return results
 
 
-def update_existing_templates(db: Session) -> Dict[str, Any]:
+def update_existing_templates(db: Session, commit: bool = True) -> Dict[str, Any]:
     """
     Update existing templates with new definitions.
 
     Use this function when you want to sync template changes
     to the database, overwriting existing templates.
 
+    All templates are upserted with a single multi-row INSERT ... ON CONFLICT DO UPDATE.
+
     Args:
         db: SQLAlchemy database session
+        commit: Commit the upserted templates; pass False to leave that to the caller
 
     Returns:
         Dictionary with update results
@@ -116,83 +152,42 @@ def update_existing_templates(db: Session) -> Dict[str, Any]:
     results = {
         "updated": [],
         "added": [],
+        "skipped": [],
         "errors": [],
     }
 
-    for template_data in LANGUAGE_TEMPLATES:
-        try:
-            template_id = template_data["id"]
-
-            # Find existing template
-            existing_template = (
-                db.query(DockerfileTemplate)
-                .filter(DockerfileTemplate.id == template_id)
-                .first()
-            )
-
-            if existing_template:
-                # Update existing template
-                existing_template.name = template_data["name"]
-                existing_template.description = template_data["description"]
-                existing_template.category = template_data["category"]
-                existing_template.dockerfile_template = template_data["dockerfile_template"]
-                existing_template.default_run_command = (
-                    json.dumps(template_data["default_run_command"])
-                    if template_data.get("default_run_command")
-                    else None
-                )
-                existing_template.tags = (
-                    json.dumps(template_data["tags"])
-                    if template_data.get("tags")
-                    else None
-                )
-                existing_template.icon = template_data.get("icon")
-                existing_template.author = template_data.get("author", "yantra")
-                existing_template.is_official = template_data.get("is_official", True)
-
-                results["updated"].append(template_id)
-            else:
-                # Create new template
-                template = DockerfileTemplate(
-                    id=template_data["id"],
-                    name=template_data["name"],
-                    description=template_data["description"],
-                    category=template_data["category"],
-                    dockerfile_template=template_data["dockerfile_template"],
-                    default_run_command=(
-                        json.dumps(template_data["default_run_command"])
-                        if template_data.get("default_run_command")
-                        else None
-                    ),
-                    tags=(
-                        json.dumps(template_data["tags"])
-                        if template_data.get("tags")
-                        else None
-                    ),
-                    icon=template_data.get("icon"),
-                    author=template_data.get("author", "yantra"),
-                    is_official=template_data.get("is_official", True),
-                )
-
-                db.add(template)
-                results["added"].append(template_id)
-
-        except Exception as e:
-            db.rollback()
-            results["errors"].append({
-                "template_id": template_id,
-                "error": str(e)
-            })
-
-    # Commit all changes
+    stmt = insert(DockerfileTemplate).values(
+        [_template_row(template_data) for template_data in LANGUAGE_TEMPLATES]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DockerfileTemplate.id],
+        set_={
+            **{
+                column: stmt.excluded[column]
+                for column in _template_row(LANGUAGE_TEMPLATES[0])
+                if column != "id"
+            },
+            "updated_at": func.now(),
+        },
+    ).returning(
+        DockerfileTemplate.id,
+        # xmax is only zero on rows the INSERT created rather than updated
+        literal_column("xmax = 0").label("inserted"),
+    )
+
     try:
-        if results["updated"] or results["added"]:
+        rows = db.execute(stmt).all()
+        if commit:
             db.commit()
     except Exception as e:
         db.rollback()
         results["errors"].append({
-            "template_id": "commit",
-            "error": f"Failed to commit changes: {str(e)}"
+            "template_id": "batch",
+            "error": f"Failed to upsert templates: {str(e)}"
         })
+        return results
+
+    for row in rows:
+        results["added" if row.inserted else "updated"].append(row.id)
 
     return results
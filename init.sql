@@ -3,7 +3,7 @@ CREATE TABLE compilers (
     id VARCHAR(50) PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
     dockerfile_content TEXT NOT NULL,
-    run_command TEXT NOT NULL, -- JSON array: ["python", "-"]
+    run_command JSONB NOT NULL, -- JSON array: ["python", "-"]
     image_tag VARCHAR(255) NOT NULL,
     version VARCHAR(50),
     memory_limit VARCHAR(20) DEFAULT '512m',
@@ -40,8 +40,8 @@ CREATE TABLE dockerfile_templates (
     description TEXT NOT NULL,
     category VARCHAR(50) NOT NULL, -- language, framework, tool, os
     dockerfile_template TEXT NOT NULL,
-    default_run_command TEXT, -- JSON array suggestion: ["python", "-"]
-    tags TEXT, -- JSON array for search/filtering: ["python", "data-science"]
+    default_run_command JSONB, -- JSON array suggestion: ["python", "-"]
+    tags JSONB, -- JSON array for search/filtering: ["python", "data-science"]
     icon VARCHAR(50), -- emoji or icon identifier
     author VARCHAR(100) DEFAULT 'yantra',
     is_official BOOLEAN DEFAULT FALSE,
@@ -55,6 +55,16 @@ CREATE INDEX idx_templates_category ON dockerfile_templates(category);
 -- Create index for official templates
 CREATE INDEX idx_templates_official ON dockerfile_templates(is_official);
 
+-- Create index for tag containment filters (tags @> '["python"]')
+CREATE INDEX idx_templates_tags ON dockerfile_templates USING GIN (tags);
+
+-- Seed bookkeeping: which version of the built-in data has been applied
+CREATE TABLE seed_meta (
+    name VARCHAR(50) PRIMARY KEY, -- e.g. 'templates'
+    version INTEGER NOT NULL,
+    seeded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Seed data: Python 3.11 compiler
 INSERT INTO compilers (id, name, dockerfile_content, run_command, image_tag, build_status, enabled)
 VALUES (
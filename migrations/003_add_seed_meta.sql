@@ -0,0 +1,7 @@
+-- Seed bookkeeping: which version of the built-in data has been applied
+-- Lets API processes skip template seeding once the current version is recorded
+CREATE TABLE IF NOT EXISTS seed_meta (
+    name VARCHAR(50) PRIMARY KEY, -- e.g. 'templates'
+    version INTEGER NOT NULL,
+    seeded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,11 @@
+-- Store JSON columns as native JSONB instead of JSON-encoded TEXT
+-- Postgres parses the existing values in place; rows must already hold valid JSON
+ALTER TABLE compilers
+    ALTER COLUMN run_command TYPE JSONB USING run_command::jsonb;
+
+ALTER TABLE dockerfile_templates
+    ALTER COLUMN default_run_command TYPE JSONB USING default_run_command::jsonb,
+    ALTER COLUMN tags TYPE JSONB USING tags::jsonb;
+
+-- Create index for tag containment filters (tags @> '["python"]')
+CREATE INDEX IF NOT EXISTS idx_templates_tags ON dockerfile_templates USING GIN (tags);
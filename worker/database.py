@@ -2,16 +2,29 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from contextlib import contextmanager
+import orjson
+import os
 
 # Database connection string
 DATABASE_URL = "postgresql://admin:admin@db/yantra_db"
 
+# Jobs this worker process runs at once
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+# One connection per concurrent job plus two for config lookups and build status writes, at least 5
+POOL_SIZE = int(os.getenv("WORKER_DB_POOL_SIZE", str(max(WORKER_CONCURRENCY + 2, 5))))
+MAX_OVERFLOW = int(os.getenv("WORKER_DB_MAX_OVERFLOW", "5"))
+# Ping connections on checkout only where the database may restart independently of the worker
+PRE_PING = os.getenv("SQLALCHEMY_PRE_PING", "0") == "1"
+
 # Create engine with connection pooling
 engine = create_engine(
     DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_pre_ping=True  # Verify connections before using
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_pre_ping=PRE_PING,
+    pool_recycle=1800,  # Replace connections before idle-kill timeouts on the server
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),  # JSONB columns go through orjson
+    json_deserializer=orjson.loads,
 )
 
 # Session factory
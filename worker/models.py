@@ -1,6 +1,6 @@
 """SQLAlchemy models for Yantra."""
 from sqlalchemy import Column, String, Integer, Boolean, Text, ForeignKey, TIMESTAMP
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 import uuid
@@ -15,7 +15,7 @@ class Compiler(Base):
     id = Column(String(50), primary_key=True)
     name = Column(String(100), nullable=False)
     dockerfile_content = Column(Text, nullable=False)
-    run_command = Column(Text, nullable=False)  # JSON string
+    run_command = Column(JSONB, nullable=False)  # e.g. ["python", "-"]
     image_tag = Column(String(255), nullable=False)
     version = Column(String(50))
     memory_limit = Column(String(20), default='512m')
@@ -1,304 +1,579 @@
+import docker
+import logging
 import redis
-import json
+import orjson
+import requests
+import socket
 import subprocess
 import os
+import shutil
 import time
-import sys
-import tempfile
-from sqlalchemy import func
-
-from database import get_db_session
+import threading
+import urllib3
+from collections import deque
+from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from docker.utils.socket import STDERR, STDOUT, frames_iter
+from sqlalchemy import func, select, update
+
+from database import WORKER_CONCURRENCY, get_db_session
 from models import Compiler, Submission
 
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # --- Config ---
-REDIS_CONN = redis.Redis(host='queue', port=6379, db=0)
 REDIS_QUEUE_NAME = "job_queue"
 REDIS_BUILD_QUEUE_NAME = "build_queue"
+QUEUE_BLOCK_TIMEOUT = 5  # Seconds a blocking pop waits for work before looping
+QUEUE_BATCH_SIZE = 8  # Most entries taken per pop; the rest stay queued for other workers
+JOB_RESULT_KEY = "job:{}"  # Cached API result; holds PENDING until the job is picked up
+COMPILER_CACHE_VERSION_KEY = "compilers:cache:version"  # INCR to retire the API's cached compiler responses
+BUILD_QUEUED_KEY = "build_queued:{}"  # API coalesces build triggers while this is set
+JOB_EVENTS_CHANNEL = "job_events"  # API long-polls wake on job IDs published here
+BUILD_TIMEOUT = 600  # Seconds before a docker build is killed
+BUILD_LOG_TAIL_LINES = 1024  # Build output lines kept for build_logs; earlier ones are dropped
+COMPILER_CONFIG_TTL = 30  # Seconds a ready compiler's config is reused without a DB query
+COMPILER_CONFIG_KEY = "compiler_config:{}"  # Ready compiler config shared by all workers
+COMPILER_CONFIG_GEN_KEY = "compiler_config_gen:{}"  # Bumped whenever a compiler's config changes
+COMPILER_CONFIG_REDIS_TTL = 60  # Seconds a shared config lives
+
+# Connections are opened on first use; the pool lets concurrent jobs talk to Redis in parallel.
+# Reads must outlast a blocking pop, or an idle queue surfaces as a socket timeout.
+REDIS_POOL = redis.ConnectionPool(
+    host='queue',
+    port=6379,
+    db=0,
+    max_connections=32,
+    health_check_interval=30,
+    socket_timeout=QUEUE_BLOCK_TIMEOUT + 5,
+)
+REDIS_CONN = redis.Redis(connection_pool=REDIS_POOL)
+
+# Stores a config read from the database only if no change bumped the compiler's
+# generation since the read began; otherwise a racing update could be overwritten
+# with the settings it replaced.
+_STORE_COMPILER_CONFIG = REDIS_CONN.register_script("""
+if (redis.call('GET', KEYS[1]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+""")
+
+# Docker Engine API client, created on first use (construction queries the daemon's version)
+_docker_client = None
+
+# One slot per job being run; the main loop pops only as many jobs as are free
+JOB_SLOTS = threading.BoundedSemaphore(WORKER_CONCURRENCY)
+
+
+def get_docker_client():
+    """Get the shared Docker Engine API client."""
+    global _docker_client
+    if _docker_client is None:
+        _docker_client = docker.from_env()
+    return _docker_client
+
+
+# language -> (monotonic time fetched, config) for compilers found ready
+_compiler_config_cache = {}
+# language -> times this process dropped its entry; a lookup that overlapped a
+# drop must not cache what it read
+_compiler_config_drops = {}
+_compiler_config_lock = threading.Lock()  # Jobs and builds share the cache across slot threads
+
+
+def get_compiler_config(db, language):
+    """
+    Fetch compiler configuration, reusing recent lookups of ready compilers.
+
+    Lookups go to this process's cache, then the cache shared by all workers
+    in Redis, and only then the database. Shared entries record the compiler's
+    generation when they were read and are ignored once it has been bumped, so
+    a change reaches a worker as soon as its own entry expires.
+    """
+    with _compiler_config_lock:
+        entry = _compiler_config_cache.get(language)
+        drops = _compiler_config_drops.get(language, 0)
+    if entry and time.monotonic() - entry[0] < COMPILER_CONFIG_TTL:
+        return entry[1]
+
+    gen_key = COMPILER_CONFIG_GEN_KEY.format(language)
+    config_key = COMPILER_CONFIG_KEY.format(language)
+    generation, cached = REDIS_CONN.mget(gen_key, config_key)
+    generation = (generation or b'').decode()
+
+    config = None
+    if cached is not None:
+        cached_generation, cached_config = orjson.loads(cached)
+        if cached_generation == generation:
+            config = cached_config
+    if config is None:
+        config = _fetch_compiler_config(db, language)
+        if config:
+            _STORE_COMPILER_CONFIG(
+                keys=[gen_key, config_key],
+                args=[generation, orjson.dumps([generation, config]), COMPILER_CONFIG_REDIS_TTL],
+            )
+
+    with _compiler_config_lock:
+        if _compiler_config_drops.get(language, 0) == drops:
+            if config:
+                _compiler_config_cache[language] = (time.monotonic(), config)
+            else:
+                _compiler_config_cache.pop(language, None)
+    return config
+
 
+def drop_compiler_config(compiler_id):
+    """Forget this process's copy of a compiler's config, including any lookup in flight."""
+    with _compiler_config_lock:
+        _compiler_config_cache.pop(compiler_id, None)
+        _compiler_config_drops[compiler_id] = _compiler_config_drops.get(compiler_id, 0) + 1
 
-def get_compiler_config(language):
+
+def _fetch_compiler_config(db, language):
     """Fetch compiler configuration from database."""
-    with get_db_session() as db:
-        compiler = db.query(Compiler).filter(
+    # Only the columns a run needs; the row also carries the Dockerfile and build logs
+    compiler = db.execute(
+        select(
+            Compiler.image_tag,
+            Compiler.run_command,
+            Compiler.memory_limit,
+            Compiler.cpu_limit,
+            Compiler.timeout_seconds,
+        ).where(
             Compiler.id == language,
             Compiler.enabled == True,
             Compiler.build_status == 'ready'
-        ).first()
+        )
+    ).first()
 
-        if not compiler:
-            return None
+    if not compiler:
+        return None
 
-        return {
-            "image_tag": compiler.image_tag,
-            "run_command": json.loads(compiler.run_command),
-            "memory_limit": compiler.memory_limit,
-            "cpu_limit": compiler.cpu_limit,
-            "timeout_seconds": compiler.timeout_seconds
-        }
+    return compiler._asdict()
+
+
+def finish_build(compiler_id, status, **values):
+    """Record a build's outcome on the compiler in a single UPDATE."""
+    with get_db_session() as db:
+        db.execute(
+            update(Compiler)
+            .where(Compiler.id == compiler_id)
+            .values(build_status=status, updated_at=func.now(), **values)
+        )
+
+
+def run_build(build_command, dockerfile_content):
+    """
+    Run a docker build, streaming its combined output into a bounded tail.
+
+    Args:
+        build_command: docker build arguments reading the Dockerfile from stdin
+        dockerfile_content: Dockerfile text written to the build's stdin
+
+    Returns:
+        Tuple of (return code, last BUILD_LOG_TAIL_LINES lines of output)
+
+    Raises:
+        subprocess.TimeoutExpired: If the build outlives BUILD_TIMEOUT; carries the tail as output
+    """
+    tail = deque(maxlen=BUILD_LOG_TAIL_LINES)
+    dropped = 0
+    timed_out = threading.Event()
+
+    process = subprocess.Popen(
+        build_command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors='replace'
+    )
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    # Reading blocks until the build writes or exits; the timer ends a build that hangs
+    timer = threading.Timer(BUILD_TIMEOUT, kill)
+    timer.start()
+    try:
+        # docker reads the whole Dockerfile before it starts writing output
+        try:
+            with process.stdin:
+                process.stdin.write(dockerfile_content)
+        except BrokenPipeError:
+            # docker exited without reading it; its output says why
+            pass
+        for line in process.stdout:
+            if len(tail) == tail.maxlen:
+                dropped += 1
+            tail.append(line)
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        # Reap the build and release its pipe even if reading the output failed
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+
+    output = ''.join(tail)
+    if dropped:
+        output = f"... ({dropped} earlier lines omitted)\n{output}"
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(build_command, BUILD_TIMEOUT, output=output)
+    return returncode, output
 
 
 def build_compiler(compiler_id):
     """Build Docker image for a compiler from its Dockerfile."""
-    print(f"Building compiler: {compiler_id}")
+    logger.info(f"Building compiler: {compiler_id}")
 
     try:
         # 1. Update status to 'building' and fetch Dockerfile
         with get_db_session() as db:
-            compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
-            if not compiler:
-                print(f"ERROR: Compiler {compiler_id} not found", file=sys.stderr)
-                return
-
-            compiler.build_status = 'building'
-            compiler.updated_at = func.now()
-            db.commit()
-
-            dockerfile_content = compiler.dockerfile_content
-            image_tag = compiler.image_tag
-
-        # 2. Create temporary directory for build context
-        with tempfile.TemporaryDirectory() as build_dir:
-            dockerfile_path = os.path.join(build_dir, "Dockerfile")
-
-            # Write Dockerfile
-            with open(dockerfile_path, 'w') as f:
-                f.write(dockerfile_content)
-
-            # 3. Build the image
-            build_command = [
-                "docker", "build",
-                "-t", image_tag,
-                build_dir
-            ]
-
-            process = subprocess.run(
-                build_command,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout for builds
-            )
+            compiler = db.execute(
+                update(Compiler)
+                .where(Compiler.id == compiler_id)
+                .values(build_status='building', updated_at=func.now())
+                .returning(Compiler.dockerfile_content, Compiler.image_tag)
+            ).first()
+        if not compiler:
+            logger.error(f"Compiler {compiler_id} not found")
+            return
+        REDIS_CONN.incr(COMPILER_CACHE_VERSION_KEY)
+
+        dockerfile_content, image_tag = compiler
+
+        # 2. Build the image; the Dockerfile goes in on stdin, so there is no build context
+        build_command = [
+            "docker", "build",
+            "-t", image_tag,
+            "-"
+        ]
 
-            # 4. Update database with result
-            with get_db_session() as db:
-                compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
-                if compiler:
-                    # Combine stdout and stderr for full build logs
-                    full_logs = ""
-                    if process.stdout:
-                        full_logs += f"=== STDOUT ===\n{process.stdout}\n"
-                    if process.stderr:
-                        full_logs += f"=== STDERR ===\n{process.stderr}\n"
-
-                    compiler.build_logs = full_logs or "No output captured"
-
-                    if process.returncode == 0:
-                        # Build succeeded
-                        compiler.build_status = 'ready'
-                        compiler.build_error = None
-                        compiler.built_at = func.now()
-                        compiler.updated_at = func.now()
-                        print(f"Successfully built compiler: {compiler_id} -> {image_tag}")
-                    else:
-                        # Build failed
-                        error_msg = process.stderr or process.stdout
-                        compiler.build_status = 'failed'
-                        compiler.build_error = error_msg
-                        compiler.updated_at = func.now()
-                        print(f"Failed to build compiler {compiler_id}: {error_msg}", file=sys.stderr)
+        returncode, output = run_build(build_command, dockerfile_content)
+
+        # 3. Update database with result
+        full_logs = f"=== OUTPUT ===\n{output}\n" if output else "No output captured"
+
+        if returncode == 0:
+            # Build succeeded
+            finish_build(
+                compiler_id, 'ready', build_logs=full_logs, build_error=None, built_at=func.now()
+            )
+            logger.info(f"Successfully built compiler: {compiler_id} -> {image_tag}")
+        else:
+            # Build failed
+            error_msg = output
+            finish_build(compiler_id, 'failed', build_logs=full_logs, build_error=error_msg)
+            logger.error(f"Failed to build compiler {compiler_id}: {error_msg}")
 
     except subprocess.TimeoutExpired as e:
         error_msg = "Build timed out after 10 minutes"
         timeout_logs = ""
-        if hasattr(e, 'stdout') and e.stdout:
-            timeout_logs += f"=== STDOUT (before timeout) ===\n{e.stdout}\n"
-        if hasattr(e, 'stderr') and e.stderr:
-            timeout_logs += f"=== STDERR (before timeout) ===\n{e.stderr}\n"
+        if e.output:
+            timeout_logs += f"=== OUTPUT (before timeout) ===\n{e.output}\n"
         timeout_logs += f"\n{error_msg}"
 
-        with get_db_session() as db:
-            compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
-            if compiler:
-                compiler.build_status = 'failed'
-                compiler.build_error = error_msg
-                compiler.build_logs = timeout_logs or error_msg
-                compiler.updated_at = func.now()
-        print(f"Build timeout for compiler {compiler_id}", file=sys.stderr)
+        finish_build(compiler_id, 'failed', build_logs=timeout_logs or error_msg, build_error=error_msg)
+        logger.error(f"Build timeout for compiler {compiler_id}")
     except Exception as e:
         error_msg = str(e)
-        with get_db_session() as db:
-            compiler = db.query(Compiler).filter(Compiler.id == compiler_id).first()
-            if compiler:
-                compiler.build_status = 'failed'
-                compiler.build_error = error_msg
-                compiler.build_logs = f"=== EXCEPTION ===\n{error_msg}"
-                compiler.updated_at = func.now()
-        print(f"Build error for compiler {compiler_id}: {e}", file=sys.stderr)
+        finish_build(
+            compiler_id, 'failed', build_logs=f"=== EXCEPTION ===\n{error_msg}", build_error=error_msg
+        )
+        logger.error(f"Build error for compiler {compiler_id}: {e}")
+    finally:
+        # Build status changed; neither the API nor the workers may keep using the old one
+        with REDIS_CONN.pipeline(transaction=False) as pipe:
+            pipe.incr(COMPILER_CACHE_VERSION_KEY)
+            pipe.incr(COMPILER_CONFIG_GEN_KEY.format(compiler_id))
+            pipe.execute()
+        drop_compiler_config(compiler_id)
 
 
 def cleanup_compiler(compiler_id, image_tag):
     """Remove Docker image for a deleted compiler."""
-    print(f"Cleaning up compiler: {compiler_id} (image: {image_tag})")
+    logger.info(f"Cleaning up compiler: {compiler_id} (image: {image_tag})")
+    REDIS_CONN.incr(COMPILER_CONFIG_GEN_KEY.format(compiler_id))
+    drop_compiler_config(compiler_id)
     try:
         # Remove the Docker image
-        cleanup_command = ["docker", "rmi", "-f", image_tag]
-        process = subprocess.run(
-            cleanup_command,
-            capture_output=True,
-            text=True,
-            timeout=60
+        get_docker_client().images.remove(image_tag, force=True)
+        logger.info(f"Successfully removed image: {image_tag}")
+
+    except docker.errors.ImageNotFound as e:
+        # Image might not exist, which is fine
+        logger.warning(f"Could not remove image {image_tag}: {e}")
+    except Exception as e:
+        logger.error(f"Cleanup error for {image_tag}: {e}")
+
+
+def finish_job(job_id, status, stdout=None, stderr=None):
+    """Record a job's final status and output in a single UPDATE."""
+    with get_db_session() as db:
+        db.execute(
+            update(Submission)
+            .where(Submission.job_id == job_id)
+            .values(
+                status=status,
+                output_stdout=stdout,
+                output_stderr=stderr,
+                completed_at=func.now(),
+            )
         )
 
-        if process.returncode == 0:
-            print(f"Successfully removed image: {image_tag}")
-        else:
-            # Image might not exist, which is fine
-            print(f"Could not remove image {image_tag}: {process.stderr}")
 
+class ExecutionTimeout(Exception):
+    """The program in a container ran past its compiler's timeout."""
+
+
+def _write_input(stream, code):
+    """Send a program's stdin, then half-close the connection so it reads EOF."""
+    try:
+        # A duplicate of the attach socket; shutdown acts on the shared connection
+        with socket.socket(fileno=os.dup(stream.fileno())) as conn:
+            conn.sendall(code.encode())
+            conn.shutdown(socket.SHUT_WR)
+    except OSError:
+        # The program exited, or was killed, without reading all of its input
+        pass
+
+
+def _read_output(stream, output, errors):
+    """Collect the demultiplexed stdout and stderr frames of an attach stream until it ends."""
+    try:
+        for stream_id, data in frames_iter(stream, tty=False):
+            if stream_id in output:
+                output[stream_id].append(data)
     except Exception as e:
-        print(f"Cleanup error for {image_tag}: {e}", file=sys.stderr)
+        errors.append(e)
+
+
+def run_container(compiler_config, code, files_directory):
+    """
+    Run code in a sandboxed container through the Docker Engine API.
+
+    Input and output go through a single attach stream, so they do not depend
+    on the host's logging driver.
+
+    Args:
+        compiler_config: Configuration from get_compiler_config
+        code: Source code, written to the program's stdin
+        files_directory: Directory of uploaded files to mount at /data, if any
+
+    Returns:
+        Tuple of (stdout, stderr)
+
+    Raises:
+        ExecutionTimeout: If the program outlives the compiler's timeout
+    """
+    volumes = {}
+    if files_directory and os.path.exists(files_directory):
+        volumes[files_directory] = {'bind': '/data', 'mode': 'ro'}  # Mount files as read-only
+
+    timeout = compiler_config['timeout_seconds']
+    container = get_docker_client().containers.create(
+        compiler_config['image_tag'],                               # Dynamic image
+        compiler_config['run_command'],                             # Dynamic run command
+        runtime='runsc',                                            # Use gVisor
+        network_mode='none',                                        # No network access
+        mem_limit=compiler_config['memory_limit'],                  # Dynamic memory limit
+        nano_cpus=int(float(compiler_config['cpu_limit']) * 1e9),   # Dynamic CPU limit
+        read_only=True,                                             # Make filesystem read-only
+        volumes=volumes,
+        stdin_open=True,                                            # Pass STDIN to container
+        working_dir='/sandbox',                                     # Set working directory
+    )
+    stream = reader = None
+    try:
+        # Attach before starting so the program sees all of its input and none of its
+        # output is missed
+        stream = container.attach_socket(params={'stdin': 1, 'stdout': 1, 'stderr': 1, 'stream': 1})
+        container.start()
+
+        # Output is drained while input is written, so a program that prints before it
+        # has read everything cannot stall on a full pipe
+        output = {STDOUT: [], STDERR: []}
+        errors = []
+        reader = threading.Thread(target=_read_output, args=(stream, output, errors), daemon=True)
+        reader.start()
+        threading.Thread(target=_write_input, args=(stream, code), daemon=True).start()
+
+        try:
+            container.wait(timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            # The wait times out reading either the headers (ReadTimeout) or the body, which
+            # requests wraps in a ConnectionError; anything else means the daemon is unreachable
+            cause = e.args[0] if e.args else None
+            if not isinstance(e, requests.exceptions.ReadTimeout) and not isinstance(
+                cause, urllib3.exceptions.ReadTimeoutError
+            ):
+                raise
+            raise ExecutionTimeout(f"Container ran past {timeout} seconds")
+
+        # The daemon ends the attach stream once the container has exited
+        reader.join(timeout)
+        if reader.is_alive():
+            raise RuntimeError("Container exited but its output stream stayed open")
+        if errors:
+            raise errors[0]
+
+        stdout = b''.join(output[STDOUT]).decode(errors='replace')
+        stderr = b''.join(output[STDERR]).decode(errors='replace')
+        return stdout, stderr
+    finally:
+        # Takes the place of --rm and kills a program still running
+        container.remove(force=True)
+        if stream is not None:
+            # Ending the connection wakes a reader that is still waiting, so it is done
+            # with the socket before that is closed
+            with suppress(OSError), socket.socket(fileno=os.dup(stream.fileno())) as conn:
+                conn.shutdown(socket.SHUT_RDWR)
+            if reader is not None:
+                reader.join()
+            stream.close()
 
 
 def run_job(job_id, code, language):
     """Execute user code in an isolated Docker container."""
     files_directory = None
     try:
-        # 1. Update DB to 'RUNNING' and get files directory
+        # 1. Update DB to 'RUNNING' and get files directory in one statement, then get
+        # the compiler configuration in the same transaction when it is not cached
         with get_db_session() as db:
-            submission = db.query(Submission).filter(Submission.job_id == job_id).first()
-            if submission:
-                submission.status = 'RUNNING'
-                files_directory = submission.files_directory
-
-        # 2. Get compiler configuration
-        compiler_config = get_compiler_config(language)
+            files_directory = db.execute(
+                update(Submission)
+                .where(Submission.job_id == job_id)
+                .values(status='RUNNING')
+                .returning(Submission.files_directory)
+            ).scalar_one_or_none()
+            compiler_config = get_compiler_config(db, language)
+        # The API cached this job as PENDING at submit time; drop it so polls hit the DB
+        REDIS_CONN.delete(JOB_RESULT_KEY.format(job_id))
+
+        # 2. Check the compiler is usable
         if not compiler_config:
             raise Exception(f"Compiler for language '{language}' is not available or not ready")
 
-        # 3. Build the Docker command with dynamic config
-        docker_command = [
-            "docker", "run",
-            "--runtime=runsc",                              # Use gVisor
-            "--rm",                                          # Clean up container
-            "--network=none",                                # No network access
-            f"--memory={compiler_config['memory_limit']}",  # Dynamic memory limit
-            f"--cpus={compiler_config['cpu_limit']}",       # Dynamic CPU limit
-            "--read-only",                                   # Make filesystem read-only
-        ]
-
-        # Add volume mount if files were uploaded
-        if files_directory and os.path.exists(files_directory):
-            docker_command.extend([
-                "-v", f"{files_directory}:/data:ro"  # Mount files as read-only
-            ])
-
-        docker_command.extend([
-            "-i",                                            # Pass STDIN to container
-            "-w", "/sandbox",                                # Set working directory
-            compiler_config['image_tag']                     # Dynamic image
-        ])
-        docker_command.extend(compiler_config['run_command'])  # Dynamic run command
-
-        # 4. Execute the command
-        process = subprocess.run(
-            docker_command,
-            input=code,
-            capture_output=True,
-            text=True,
-            timeout=compiler_config['timeout_seconds']
-        )
+        # 3. Run the code in a sandboxed container
+        stdout, stderr = run_container(compiler_config, code, files_directory)
 
-        stdout = process.stdout
-        stderr = process.stderr
+        # 4. Update DB to 'COMPLETED'
+        finish_job(job_id, 'COMPLETED', stdout, stderr)
 
-        # 5. Update DB to 'COMPLETED'
-        with get_db_session() as db:
-            submission = db.query(Submission).filter(Submission.job_id == job_id).first()
-            if submission:
-                submission.status = 'COMPLETED'
-                submission.output_stdout = stdout
-                submission.output_stderr = stderr
-                submission.completed_at = func.now()
-
-        # 6. Cleanup uploaded files immediately after execution
+        # 5. Cleanup uploaded files immediately after execution
         if files_directory and os.path.exists(files_directory):
-            import shutil
             shutil.rmtree(files_directory)
-            print(f"Cleaned up files directory: {files_directory}")
+            logger.info(f"Cleaned up files directory: {files_directory}")
 
-    except subprocess.TimeoutExpired:
+    except ExecutionTimeout:
         timeout = compiler_config.get('timeout_seconds', 10) if compiler_config else 10
-        with get_db_session() as db:
-            submission = db.query(Submission).filter(Submission.job_id == job_id).first()
-            if submission:
-                submission.status = 'TIMEOUT'
-                submission.output_stderr = f'Execution timed out after {timeout} seconds.'
-                submission.completed_at = func.now()
+        finish_job(job_id, 'TIMEOUT', stderr=f'Execution timed out after {timeout} seconds.')
 
         # Cleanup files on timeout
         if files_directory and os.path.exists(files_directory):
-            import shutil
             shutil.rmtree(files_directory)
-            print(f"Cleaned up files directory after timeout: {files_directory}")
+            logger.info(f"Cleaned up files directory after timeout: {files_directory}")
 
     except Exception as e:
-        print(f"DEBUG: Job {job_id} failed: {e}", file=sys.stderr)
-        with get_db_session() as db:
-            submission = db.query(Submission).filter(Submission.job_id == job_id).first()
-            if submission:
-                submission.status = 'ERROR'
-                submission.output_stderr = str(e)
-                submission.completed_at = func.now()
+        logger.exception(f"Job {job_id} failed: {e}")
+        finish_job(job_id, 'ERROR', stderr=str(e))
 
         # Cleanup files on error
         if files_directory and os.path.exists(files_directory):
-            import shutil
             shutil.rmtree(files_directory)
-            print(f"Cleaned up files directory after error: {files_directory}")
-
-
-def process_job_queue():
-    """Check for and process a job from the job queue (non-blocking)."""
-    job_data = REDIS_CONN.rpop(REDIS_QUEUE_NAME)
-    if job_data:
-        job = json.loads(job_data)
-        job_id = job.get("job_id")
-        code = job.get("code")
-        language = job.get("language")
-        print(f"Processing job: {job_id} (language: {language})")
-        run_job(job_id, code, language)
-        return True
-    return False
-
-
-def process_build_queue():
-    """Check for and process a build/cleanup job from the build queue (non-blocking)."""
-    build_data = REDIS_CONN.rpop(REDIS_BUILD_QUEUE_NAME)
-    if build_data:
-        build_job = json.loads(build_data)
-        action = build_job.get("action")
-
-        if action == "build":
-            compiler_id = build_job.get("compiler_id")
-            build_compiler(compiler_id)
-        elif action == "cleanup":
-            compiler_id = build_job.get("compiler_id")
-            image_tag = build_job.get("image_tag")
-            cleanup_compiler(compiler_id, image_tag)
-
-        return True
-    return False
+            logger.info(f"Cleaned up files directory after error: {files_directory}")
+
+    finally:
+        # The job's final status is committed; wake any API requests waiting on it
+        REDIS_CONN.publish(JOB_EVENTS_CHANNEL, job_id)
+
+
+def process_job(job_data):
+    """Run a job popped from the job queue."""
+    job = orjson.loads(job_data)
+    job_id = job.get("job_id")
+    code = job.get("code")
+    language = job.get("language")
+    logger.info(f"Processing job: {job_id} (language: {language})")
+    run_job(job_id, code, language)
+
+
+def process_build(build_data):
+    """Run a build/cleanup job popped from the build queue."""
+    build_job = orjson.loads(build_data)
+    action = build_job.get("action")
+
+    if action == "build":
+        compiler_id = build_job.get("compiler_id")
+        # Picked up; a new trigger should queue another build
+        REDIS_CONN.delete(BUILD_QUEUED_KEY.format(compiler_id))
+        build_compiler(compiler_id)
+    elif action == "cleanup":
+        compiler_id = build_job.get("compiler_id")
+        image_tag = build_job.get("image_tag")
+        cleanup_compiler(compiler_id, image_tag)
+
+
+def run_in_slot(job_data):
+    """Run a job on a pool thread, then free its slot."""
+    try:
+        process_job(job_data)
+    except Exception as e:
+        logger.exception(f"Unhandled failure processing job: {e}")
+    finally:
+        JOB_SLOTS.release()
+
+
+def process_builds_forever():
+    """
+    Run build-queue entries one at a time, in queue order.
+
+    Builds and cleanups of one compiler share its image tag and database row,
+    so they must not overlap; they stay on this single thread while jobs run
+    on the pool.
+    """
+    while True:
+        # Producers LPUSH, so popping from the right is FIFO
+        popped = REDIS_CONN.brpop(REDIS_BUILD_QUEUE_NAME, QUEUE_BLOCK_TIMEOUT)
+        if popped is None:
+            continue
+        try:
+            process_build(popped[1])
+        except Exception as e:
+            logger.exception(f"Unhandled failure processing build queue entry: {e}")
 
 
 def main():
-    print("Worker started. Processing jobs and builds...")
+    logger.info(f"Worker started. Running {WORKER_CONCURRENCY} jobs at a time and builds in order...")
+    threading.Thread(target=process_builds_forever, name="builds", daemon=True).start()
+    executor = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY)
     while True:
-        # Process both queues in a round-robin fashion
-        job_processed = process_job_queue()
-        build_processed = process_build_queue()
+        # Wait for a free slot, then claim any others so one pop can fill them all
+        JOB_SLOTS.acquire()
+        free = 1
+        while free < QUEUE_BATCH_SIZE and JOB_SLOTS.acquire(blocking=False):
+            free += 1
+
+        # Block in Redis until there are jobs, then take a burst of them in the same
+        # round-trip; producers LPUSH, so popping from the right is FIFO
+        popped = REDIS_CONN.blmpop(
+            QUEUE_BLOCK_TIMEOUT, 1, REDIS_QUEUE_NAME, direction='RIGHT', count=free
+        )
+
+        batch = popped[1] if popped is not None else []
+        for _ in range(free - len(batch)):
+            JOB_SLOTS.release()
 
-        # If no work was done, sleep briefly to avoid tight loop
-        if not job_processed and not build_processed:
-            time.sleep(0.5)
+        for data in batch:
+            executor.submit(run_in_slot, data)
 
 
 if __name__ == "__main__":